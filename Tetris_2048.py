@@ -9,11 +9,20 @@ from lib.picture import Picture  # used for displaying an image on the game menu
 from lib.color import Color  # used for coloring the game menu
 import os  # the os module is used for file and directory operations
 from game_grid import GameGrid  # the class for modeling the game grid
+from game_view import GameView  # the class for displaying the game grid
 from tetromino import Tetromino  # the class for modeling the tetrominoes
 import random  # used for creating tetrominoes with random types (shapes)
-import time # used for creating diffuculty settings
+from profiler import Profiler  # used for measuring the frame times
+import atexit  # used for saving the profiling statistics on exit
 
 fall_delay = 0.5 # A global variable for fall delay, it is default by 0.5
+target_fps = 60 # A global variable for the number of frames per second
+max_frame_time = 0.25 # The longest frame time (in seconds) that is simulated
+pause_wait_time = 1000 # The longest wait for an event (in ms) while paused
+# The delay (in ms) before a held arrow key repeats and the interval between
+# the repeats (the delayed auto shift and the auto repeat rate)
+key_repeat_delay, key_repeat_interval = 170, 50
+profile_file = "profile.json" # The file the profiling statistics are saved to
 is_paused = False # A global variable for pause game
 
 # The main function where this program starts execution
@@ -27,6 +36,8 @@ def start():
    # increase the size for scoreboard and showing the next piece
    canvas_w += 8 * 40
    stddraw.setCanvasSize(canvas_w, canvas_h)
+   # update only the changed parts of the window in each frame
+   stddraw.setDirtyRectMode(True)
    # set the scale of the coordinate system for the drawing canvas
    # added +7 to open space for scoreboard and showing the next piece
    stddraw.setXscale(-0.5, grid_w +8 - 0.5)
@@ -37,6 +48,8 @@ def start():
    Tetromino.grid_width = grid_w
    # create the game grid
    grid = GameGrid(grid_h, grid_w)
+   # create the view used for displaying the game grid
+   view = GameView(grid)
    # create the first tetromino to enter the game grid
    # by using the create_tetromino function defined below
    current_tetromino = create_tetromino()
@@ -45,54 +58,87 @@ def start():
    # display a simple menu before opening the game
    # by using the display_game_menu function defined below
    display_game_menu(grid_h, grid_w)
-   # record the current time to initialize the auto-fall timer for tetrominos
-   last_fall_time = time.time()
+   # the arrow keys for moving the tetromino repeat while they are held down
+   stddraw.setKeyRepeat(key_repeat_delay, key_repeat_interval,
+                        ("left", "right", "down"))
+   # the time passed since the last auto-fall of the tetromino (in seconds),
+   # the tetromino falls down by one every fall_delay seconds of this time
+   fall_timer = 0.0
+   # the time passed since the last frame (in seconds)
+   frame_time = 0.0
    game_over = False # declaring game over variable False by default
+   # the pause message is drawn only once each time the game is paused
+   is_pause_message_shown = False
+   # the profiler for measuring the phases of the frames and the steps of the
+   # grid updates (it is toggled by the F3 key and its statistics are saved
+   # to profile_file when the program exits if any frame is measured)
+   profiler = Profiler()
+   grid.profiler = profiler
+   view.profiler = profiler
+   atexit.register(profiler.dump, profile_file)
 
-   # the main game loop
-   while True:
-      # check for any user interaction via the keyboard
-      if stddraw.hasNextKeyTyped():  # check if the user has pressed a key
-         key_typed = stddraw.nextKeyTyped()  # the most recently pressed key
-         # if the left arrow key has been pressed
-         if key_typed == "left":
-            # move the active tetromino left by one
-            current_tetromino.move(key_typed, grid)
-         # if the right arrow key has been pressed
-         elif key_typed == "right":
-            # move the active tetromino right by one
-            current_tetromino.move(key_typed, grid)
-         # if the down arrow key has been pressed
-         elif key_typed == "down":
-            # move the active tetromino down by one
-            # (soft drop: causes the tetromino to fall down faster)
-            current_tetromino.move(key_typed, grid)
-         elif key_typed == "up":
-            # rotate the active tetromino
-            current_tetromino.rotation(grid)
-         elif key_typed == "space":
-            while current_tetromino.move("down", grid):
-            # performs hard drop action to tetromino
-             pass
-         elif key_typed == "p":
-            is_paused = not is_paused
-         # clear the queue of the pressed keys for a smoother interaction
-         stddraw.clearKeysTyped()
+   # the main game loop (each iteration is a frame of the game, the input
+   # is handled in every frame and the frames are paced to target_fps)
+   while not game_over:
+      # handle all the keys the user typed since the last frame (in order)
+      with profiler.measure("input"):
+         for key_typed, key_time in stddraw.drainKeys():
+            if key_typed == "p":
+               is_paused = not is_paused
+               is_pause_message_shown = False
+            # toggle measuring the frames and showing their summary
+            elif key_typed == "f3":
+               profiler.toggle()
+            # the tetromino does not move while the game is paused
+            elif is_paused:
+               continue
+            # if the left arrow key has been pressed
+            elif key_typed == "left":
+               # move the active tetromino left by one
+               current_tetromino.move(key_typed, grid)
+            # if the right arrow key has been pressed
+            elif key_typed == "right":
+               # move the active tetromino right by one
+               current_tetromino.move(key_typed, grid)
+            # if the down arrow key has been pressed
+            elif key_typed == "down":
+               # move the active tetromino down by one
+               # (soft drop: causes the tetromino to fall down faster)
+               current_tetromino.move(key_typed, grid)
+            elif key_typed == "up":
+               # rotate the active tetromino
+               current_tetromino.rotation(grid)
+            elif key_typed == "space":
+               # performs hard drop action to tetromino
+               current_tetromino.hard_drop(grid)
 
       #check if the game is paused
       if is_paused:
-         display_pause_message(grid_h, grid_w) # displays the pause text on screen
+         if not is_pause_message_shown:
+            display_pause_message(grid_h, grid_w) # displays the pause text on screen
+            is_pause_message_shown = True
+            # the whole display is drawn over the pause message after the
+            # game is resumed
+            view.invalidate()
+         # sleep until a key is pressed (the display does not change while
+         # the game is paused, so there is nothing to do until then)
+         stddraw.waitForEvent(pause_wait_time)
+         # the time spent while paused does not count for the auto-fall
+         # and for the frame times
+         frame_time = 0.0
+         profiler.skip_frame()
          continue
 
-      if not is_paused:
-         # capture the current time to check against the last fall time for auto-falling tetrominos
-         current_time = time.time()
-         # check if the auto fall interval has elapsed
-         if current_time - last_fall_time > fall_delay:
+      # add the time of the last frame to the auto-fall timer and move the
+      # tetromino down once for each fall_delay seconds in this timer (the
+      # frame time is limited to skip the time when the game does not run,
+      # e.g. while the window is dragged)
+      with profiler.measure("gravity"):
+         fall_timer += min(frame_time, max_frame_time)
+         while fall_timer >= fall_delay:
+            fall_timer -= fall_delay
             #attempt to move the current tetromino down
             success = current_tetromino.move("down", grid)
-            #update the time of the last succesful fall
-            last_fall_time = current_time
             # check if the tetromino could not move down
             if not success:
                # lock the current tetromino, indicating it cannot move anymore
@@ -100,16 +146,24 @@ def start():
                # retrieve the minimal bounding matrix of the tetromino and its grid position
                tiles, pos = current_tetromino.get_min_bounded_tile_matrix(True)
                # Lock the tetrominos tiles onto the game grid
-               game_over = grid.update_grid(tiles, pos)
+               with profiler.measure("update_grid"):
+                  game_over = grid.update_grid(tiles, pos)
                #  check if the last tetromino landed over the border
                if game_over:
                   print("Game Over")
                   break
                # create a new tetromino
                current_tetromino = grid.update_tetromino()
+               # the new tetromino starts falling after a full fall_delay
+               fall_timer = 0.0
 
       # display the game grid with the current tetromino
-      grid.display()
+      with profiler.measure("display"):
+         view.display()
+      # show the frame and wait until the time of the next frame
+      with profiler.measure("show"):
+         frame_time = stddraw.showFrame(target_fps) / 1000
+      profiler.end_frame()
 
    # print a message on the console when the game is over
    print("Game over")
@@ -119,7 +173,7 @@ def display_pause_message(grid_h, grid_w):
    stddraw.setFontFamily("Retro")
    stddraw.setPenColor(stddraw.WHITE)
    stddraw.text(grid_w / 2 - 0.6, grid_h / 2, "Paused")
-   stddraw.show(100)
+   stddraw.show(0)
 
 # A function for creating random shaped tetrominoes to enter the game grid
 def create_tetromino():
@@ -0,0 +1,17 @@
+import pytest  # used for defining the fixtures shared by the tests
+from game_grid import GameGrid  # the class for modeling the game grid
+from tetromino import Tetromino  # the class for modeling the tetrominoes
+
+# A fixture that returns a function for creating empty game grids with the
+# given dimensions (at least 4 columns are needed for creating the next
+# tetromino). The dimensions of the game grid used by the Tetromino class are
+# restored after the test
+@pytest.fixture
+def create_grid():
+   saved = Tetromino.grid_height, Tetromino.grid_width
+   def create(grid_h=20, grid_w=12):
+      Tetromino.grid_height = grid_h
+      Tetromino.grid_width = grid_w
+      return GameGrid(grid_h, grid_w)
+   yield create
+   Tetromino.grid_height, Tetromino.grid_width = saved
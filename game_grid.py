@@ -1,32 +1,50 @@
-import lib.stddraw as stddraw  # used for displaying the game grid
-from lib.color import Color  # used for coloring the game grid
 from point import Point  # used for tile positions
 import numpy as np  # fundamental Python module for scientific computing
+import contextlib  # used when the grid updates are not profiled
 from tetromino import Tetromino # used for showing next tetromino
 import random
-# A class for modeling the game grid
+# A class for modeling the game grid (the game logic only, see the GameView
+# class in game_view.py for displaying it)
 class GameGrid:
    # A constructor for creating the game grid based on the given arguments
-   def __init__(self, grid_h, grid_w):
+   # (the rows of the grid are also kept as bitmasks when use_bitboard is True
+   # so that the tetrominoes can check collisions with a few integer operations)
+   def __init__(self, grid_h, grid_w, use_bitboard=False):
       # set the dimensions of the game grid as the given arguments
       self.grid_height = grid_h
       self.grid_width = grid_w
-      # create a tile matrix to store the tiles locked on the game grid
-      self.tile_matrix = np.full((grid_h, grid_w), None)
+      # create a tile matrix to store the tiles locked on the game grid as
+      # the exponents of their numbers (number = 2 ** exponent) and 0 for the
+      # empty cells, this takes 1 byte per cell and allows using numpy
+      # operations on the whole board
+      self.tile_matrix = np.zeros((grid_h, grid_w), dtype=np.uint8)
+      # create a mask to store whether the tiles are connected to the ground
+      self.connected = np.zeros((grid_h, grid_w), dtype=bool)
+      # the occupied cells of each row as an integer bitmask (the bit col is
+      # set if the cell in the column col is occupied) or None if they are
+      # not kept
+      self.row_bits = [0] * grid_h if use_bitboard else None
+      # the number of rows up to the topmost tile in each column of the grid
+      # (0 for the empty columns), used for dropping the tetrominoes at once
+      self.column_heights = np.zeros(grid_w, dtype=np.int32)
+      # the number of updates of the grid, used for knowing whether the values
+      # computed from the grid (e.g. landing positions) are still valid
+      self.version = 0
+      # the rows and the columns changed by the last update of the grid
+      # (only these rows and columns are checked for merges and full rows)
+      self.dirty_rows, self.dirty_columns = set(), set()
+      # the whole grid must be checked in the next update after rows are
+      # removed as all the tiles above the removed rows are shifted down
+      self.full_pass_needed = False
       # create the tetromino that is currently being moved on the game grid
       self.current_tetromino = None
       # the game_over flag shows whether the game is over or not
       self.game_over = False
-      # set the color used for the empty grid cells
-      self.empty_cell_color = Color(45, 45, 45)
-      # set the colors used for the grid lines and the grid boundaries
-      self.line_color = Color(80, 80, 80)
-      self.boundary_color = Color(200, 200, 200)
-      # thickness values used for the grid lines and the grid boundaries
-      self.line_thickness = 0.002
-      self.box_thickness = 5 * self.line_thickness
       self.score = 0 # new variable for scoreboard
       self.next_tetromino = self.create_tetromino()
+      # the profiler (see profiler.py) used for measuring the steps of the
+      # grid updates, or None if they are not measured
+      self.profiler = None
 
    def create_tetromino(self):
       # create a random tetromino
@@ -39,142 +57,55 @@ class GameGrid:
       self.next_tetromino = self.create_tetromino()
       return self.current_tetromino
 
-   def draw_next_tetromino(self):
-      base_x = self.grid_width + 0.7
-      base_y = self.grid_height - 20
-      grid_size = 4
-      tile_size = 1.5
+   # A method that returns the sum of the numbers on the tiles with the given
+   # exponents (the empty cells with 0 exponents are not counted)
+   def sum_numbers(self, exponents):
+      exponents = exponents[exponents != 0]
+      return int(np.left_shift(1, exponents, dtype=np.int64).sum())
 
-      # calcute size of tetromino
-      tetromino_width = len(self.next_tetromino.tile_matrix[0])
-      tetromino_height = len(self.next_tetromino.tile_matrix)
+   # A method that computes the heights of the given columns (or all the
+   # columns when columns is None) from the tile matrix
+   def update_column_heights(self, columns=None):
+      if columns is None:
+         columns = range(self.grid_width)
+      columns = sorted(columns)
+      occupied = self.tile_matrix[:, columns] != 0
+      # the row index of the topmost occupied cell + 1 in each column
+      top = self.grid_height - np.argmax(occupied[::-1], axis=0)
+      self.column_heights[columns] = np.where(occupied.any(axis=0), top, 0)
 
-      # draw tetromino
-      for row in range(tetromino_height):
-         for col in range(tetromino_width):
-            if self.next_tetromino.tile_matrix[row][col] is not None:
-               draw_x = base_x + (col + (grid_size - tetromino_width) / 2) * tile_size + tile_size / 2
-               draw_y = base_y + (grid_size - 1 - row - (grid_size - tetromino_height) / 2) * tile_size + tile_size / 2
+   # A method that computes the bitmasks of the rows from the tile matrix
+   def update_row_bits(self):
+      # pack the occupied cells of each row into bytes (the first column is
+      # the least significant bit) and convert them into Python integers
+      packed = np.packbits(self.tile_matrix != 0, axis=1, bitorder='little')
+      self.row_bits = [int.from_bytes(row.tobytes(), 'little') for row in packed]
 
-               # fill the background of every cell with appropaite color
-               if self.next_tetromino.tile_matrix[row][col].number == 2:
-                  stddraw.setPenColor(Color(239, 230, 221))
-               elif self.next_tetromino.tile_matrix[row][col].number == 4:
-                  stddraw.setPenColor(Color(239, 227, 205))
-
-               stddraw.filledSquare(draw_x, draw_y, tile_size / 2)
-
-               # show number of the tile
-               stddraw.setPenColor(Color(30, 30, 30))
-               stddraw.text(draw_x, draw_y, str(self.next_tetromino.tile_matrix[row][col].number))
-
-               # draw frame for each tile
-               stddraw.setPenColor(Color(0, 0, 0))  # set frame color black
-               stddraw.setPenRadius(0.005)  # thickness of frame
-               stddraw.rectangle(draw_x - tile_size / 2, draw_y - tile_size / 2, tile_size, tile_size)
-
-      # reset thickness
-      stddraw.setPenRadius()
-
-   # A method for displaying the game grid
-   def display(self):
-      # clear the background to empty_cell_color
-      stddraw.clear(self.empty_cell_color)
-      # draw the game grid
-      self.draw_grid()
-      # draw the current/active tetromino if it is not None
-      # (the case when the game grid is updated)
-      if self.current_tetromino is not None:
-         self.current_tetromino.draw()
-      # draw a box around the game grid
-      self.draw_boundaries()
-      # draw scoreboard
-      stddraw.setFontFamily("Retro")
-      stddraw.setFontSize(60)
-      stddraw.setPenColor(Color(255, 255, 255))
-      score_text_x = self.grid_width + 3.5
-      score_text_y = self.grid_height -3
-      score_value_y = self.grid_height -5
-      info_pause = self.grid_height -8
-      stddraw.text(score_text_x, score_text_y, "SCORE")
-      stddraw.text(score_text_x, score_value_y, str(self.score))
-      stddraw.setFontSize(30)
-      stddraw.text(score_text_x, info_pause, "P to pause")
-      self.draw_next_tetromino()
-      # show the resulting drawing with a pause duration = 250 ms
-      stddraw.show(250)
-
-   # A method for drawing the cells and the lines of the game grid
-   def draw_grid(self):
-      # for each cell of the game grid
-      for row in range(self.grid_height):
-         for col in range(self.grid_width):
-            # if the current grid cell is occupied by a tile
-            if self.tile_matrix[row][col] is not None:
-               # draw this tile
-               self.tile_matrix[row][col].draw(Point(col, row))
-      # draw the inner lines of the game grid
-      stddraw.setPenColor(self.line_color)
-      stddraw.setPenRadius(self.line_thickness)
-      # x and y ranges for the game grid
-      start_x, end_x = -0.5, self.grid_width - 0.5
-      start_y, end_y = -0.5, self.grid_height - 0.5
-      for x in np.arange(start_x + 1, end_x, 1):  # vertical inner lines
-         stddraw.line(x, start_y, x, end_y)
-      for y in np.arange(start_y + 1, end_y, 1):  # horizontal inner lines
-         stddraw.line(start_x, y, end_x, y)
-      stddraw.setPenRadius()  # reset the pen radius to its default value
-
-   # A method for drawing the boundaries around the game grid
-   def draw_boundaries(self):
-      # draw a bounding box around the game grid as a rectangle
-      stddraw.setPenColor(self.boundary_color)  # using boundary_color
-      # set the pen radius as box_thickness (half of this thickness is visible
-      # for the bounding box as its lines lie on the boundaries of the canvas)
-      stddraw.setPenRadius(self.box_thickness)
-      # the coordinates of the bottom left corner of the game grid
-      pos_x, pos_y = -0.5, -0.5
-      stddraw.rectangle(pos_x, pos_y, self.grid_width, self.grid_height)
-      stddraw.setPenRadius()  # reset the pen radius to its default value
-
-   # A method used checking whether the grid cell with the given row and column
-   # indexes is occupied by a tile or not (i.e., empty)
-   def is_occupied(self, row, col):
-      # considering the newly entered tetrominoes to the game grid that may
-      # have tiles with position.y >= grid_height
-      if not self.is_inside(row, col):
-         return False  # the cell is not occupied as it is outside the grid
-      # the cell is occupied by a tile if it is not None
-      return self.tile_matrix[row][col] is not None
-
-      #check if the row full
-   def full_row_check(self, row):
-      for col in range(self.grid_width):
-         if self.tile_matrix[row][col] is None:
-            return False
-      return True
-   #
-   #a
-   #add score counter here 
-   #for every tile that we remove add its point to sum
-   #   
-   def remove_row(self, row):
-      for col in range(self.grid_width):
-         if self.tile_matrix[row][col] is not None:
-            self.score += self.tile_matrix[row][col].number # compute the sum of numbers on removed tiles
-         self.tile_matrix[row][col] = None
-   #shift all rows down
-   def shift_row(self, row):
-      for r in range(row+1,self.grid_height):
-         for col in range(self.grid_width):
-            self.tile_matrix[r-1][col] = self.tile_matrix[r][col]
-            self.tile_matrix[r][col] = None
-   #gaher up all remove row functions
-   def full_row_remove(self):
-      for row in range(self.grid_height):
-         while self.full_row_check(row):
-            self.remove_row(row)
-            self.shift_row(row)
+   # A method for removing the full rows and adding the numbers on their tiles
+   # to the score (all the full rows are found and removed at once and the
+   # remaining rows are moved down in a single slice operation, only the
+   # given rows are checked if rows is not None)
+   # (This method returns the number of the removed rows.)
+   def full_row_remove(self, rows=None):
+      if rows is None:
+         full_rows = self.tile_matrix.all(axis=1)
+      else:
+         rows = sorted(rows)
+         full_rows = np.zeros(self.grid_height, dtype=bool)
+         full_rows[rows] = self.tile_matrix[rows].all(axis=1)
+      n_full = int(np.count_nonzero(full_rows))
+      if n_full == 0:
+         return 0
+      # compute the sum of numbers on the tiles of all the removed rows
+      self.score += self.sum_numbers(self.tile_matrix[full_rows])
+      # move the remaining rows down by keeping their order
+      remaining_rows = ~full_rows
+      n_remaining = self.grid_height - n_full
+      self.tile_matrix[:n_remaining] = self.tile_matrix[remaining_rows]
+      self.tile_matrix[n_remaining:] = 0
+      self.connected[:n_remaining] = self.connected[remaining_rows]
+      self.connected[n_remaining:] = False
+      return n_full
 
    # A method for checking whether the cell with the given row and col indexes
    # is inside the game grid or not
@@ -191,6 +122,11 @@ class GameGrid:
    def update_grid(self, tiles_to_lock, blc_position):
       # necessary for the display method to stop displaying the tetromino
       self.current_tetromino = None
+      self.version += 1
+      # the rows and the columns changed by this update
+      self.dirty_rows, self.dirty_columns = set(), set()
+      # the grid positions of the locked tiles as (row, col) pairs
+      locked_cells = []
       # lock the tiles of the current tetromino (tiles_to_lock) on the grid
       n_rows, n_cols = len(tiles_to_lock), len(tiles_to_lock[0])
       for col in range(n_cols):
@@ -202,89 +138,160 @@ class GameGrid:
                pos.x = blc_position.x + col
                pos.y = blc_position.y + (n_rows - 1) - row
                if self.is_inside(pos.y, pos.x):
-                  self.tile_matrix[pos.y][pos.x] = tiles_to_lock[row][col]
+                  # store the exponent of the number on the tile
+                  number = tiles_to_lock[row][col].number
+                  self.tile_matrix[pos.y][pos.x] = number.bit_length() - 1
+                  locked_cells.append((pos.y, pos.x))
+                  self.dirty_rows.add(pos.y)
+                  self.dirty_columns.add(pos.x)
                # the game is over if any placed tile is above the game grid
                else:
                   self.game_over = True
+      if self.full_pass_needed:
+         # check the whole grid as the rows were shifted by the last update
+         self.dirty_rows = set(range(self.grid_height))
+         self.dirty_columns = set(range(self.grid_width))
+         with self.measure("merge"):
+            self.merge()
+         with self.measure("connectivity"):
+            self.eliminate_floating_pieces()
+      else:
+         # only the columns of the locked tiles can have tiles to merge
+         with self.measure("merge"):
+            merged = self.merge(self.dirty_columns)
+         with self.measure("connectivity"):
+            if merged:
+               # merged tiles may leave any tile floating
+               self.eliminate_floating_pieces()
+            else:
+               # adding tiles does not disconnect any tile, so only the
+               # locked tiles need to be checked
+               self.eliminate_floating_pieces(locked_cells)
+      # only the rows that tiles are placed on can become full
+      with self.measure("line_clear"):
+         n_removed = self.full_row_remove(self.dirty_rows)
+      self.full_pass_needed = n_removed > 0
+      if n_removed > 0:
+         # all the rows above the lowest removed row are changed
+         self.dirty_rows = set(range(self.grid_height))
+         self.dirty_columns = set(range(self.grid_width))
+      # the heights can only change in the changed columns
+      self.update_column_heights(self.dirty_columns)
+      if self.row_bits is not None:
+         self.update_row_bits()
       # return the value of the game_over flag
-      self.merge()
-      self.eliminate_floating_pieces()
-      self.full_row_remove()
       return self.game_over
 
-   # check merging for every column
-   def merge(self):
-      for col in range(self.grid_width):
-         control = True
-         while control:
-            control = self.merge_control(col)
+   # A method that returns a context manager for measuring the duration of
+   # the given step of updating the grid (as the phase "update_grid.step") by
+   # using the profiler if it is set
+   def measure(self, step):
+      if self.profiler is None:
+         return contextlib.nullcontext()
+      return self.profiler.measure("update_grid." + step)
 
-   # check and merge tiles on the same column from bottom to top
-   def merge_control(self, col):
-      for row in range(self.grid_height - 1):
-         if self.tile_matrix[row][col] is not None and self.tile_matrix[row + 1][col] is not None:
-            if self.tile_matrix[row][col].number == self.tile_matrix[row + 1][col].number:
-               self.tile_matrix[row][col].number += self.tile_matrix[row][col].number
-               self.score += self.tile_matrix[row][col].number
-               self.tile_matrix[row + 1][col] = None
-               for r in range(row + 1, self.grid_height - 1):
-                  self.tile_matrix[r][col] = self.tile_matrix[r + 1][col]
-               return True
-      return False
+   # check merging for every column, or only for the given columns when
+   # columns is not None (only the columns that have at least one pair of
+   # vertically adjacent tiles with the same number are processed)
+   # (This method returns True if any tiles are merged and False otherwise.)
+   def merge(self, columns=None):
+      if columns is None:
+         columns = range(self.grid_width)
+      columns = sorted(columns)
+      matrix = self.tile_matrix[:, columns]
+      lower, upper = matrix[:-1], matrix[1:]
+      has_pair = ((lower != 0) & (lower == upper)).any(axis=0)
+      for index in np.flatnonzero(has_pair):
+         self.merge_column(columns[index])
+      return bool(has_pair.any())
 
-   def free_piece_remove(self):
-      for col in range(self.grid_width):
-         for row in range(self.grid_height):
-            if not self.free_piece_control(row, col):
-               self.tile_matrix[row][col] = None
+   # merge tiles on the same column from bottom to top in a single pass
+   # (the lowest pair of tiles with the same number is always merged first
+   # and the tiles above a merged pair are shifted down by one, so the
+   # merged tile may merge again with the tile below it)
+   def merge_column(self, col):
+      column = self.tile_matrix[:, col]  # a view of the column
+      merged = []  # the resulting column from bottom to top
+      lowest_merge = None  # the lowest row that a merge happened on
+      for exponent in column.tolist():
+         merged.append(exponent)
+         # merge the topmost two tiles as long as they have the same number
+         while len(merged) > 1 and merged[-1] != 0 and merged[-1] == merged[-2]:
+            merged.pop()
+            # doubling the number means incrementing its exponent
+            merged[-1] += 1
+            self.score += 1 << merged[-1]
+            if lowest_merge is None or len(merged) - 1 < lowest_merge:
+               lowest_merge = len(merged) - 1
+      column[:len(merged)] = merged
+      column[len(merged):] = 0
+      # the tiles from the lowest merge up to the top of the column changed
+      if lowest_merge is not None:
+         self.dirty_columns.add(col)
+         self.dirty_rows.update(range(lowest_merge, len(merged)))
 
-   # delete all floating pieces
-   def eliminate_floating_pieces(self):
-      self.check_connections()
-      for row in range(self.grid_height):
-         for col in range(self.grid_width):
-            if self.tile_matrix[row][col] is not None:
-               if self.tile_matrix[row][col].is_connected == False:
-                  self.score += self.tile_matrix[row][col].number
-                  self.tile_matrix[row][col] = None
-      self.check_connections()
+   # delete all floating pieces, or only the floating ones among the given
+   # cells (as (row, col) pairs) when cells is not None
+   def eliminate_floating_pieces(self, cells=None):
+      self.check_connections(cells)
+      floating = (self.tile_matrix != 0) & ~self.connected
+      if cells is not None:
+         selected = np.zeros_like(floating)
+         for row, col in cells:
+            selected[row][col] = True
+         floating &= selected
+      self.score += self.sum_numbers(self.tile_matrix[floating])
+      self.tile_matrix[floating] = 0
+      # the columns of the removed tiles are changed
+      self.dirty_columns.update(np.flatnonzero(floating.any(axis=0)).tolist())
 
-   # check all the tiles if they are connected
-   def check_connections(self):
-      for row in range(self.grid_height):
-         for col in range(self.grid_width):
-            if self.tile_matrix[row][col] is not None:
-               self.tile_matrix[row][col].is_connected = False
-      # tiles at the ground are connected
-      for col in range(self.grid_width):
-         if self.tile_matrix[0][col] is not None:
-            self.tile_matrix[0][col].is_connected = True
-      for x in range(10):
-         # check all the tiles above the ground to see if they're connected
-         self.sweep()
-
-   def sweep(self):
-      # check all the tiles starting from bottom to top
-      for row in range(1, self.grid_height):
-         for col in range(self.grid_width):
-            if self.tile_matrix[row][col] is not None:
-               # check the below neighbor
-               if self.tile_matrix[row - 1][col] is not None:
-                  if self.tile_matrix[row - 1][col].is_connected == True:
-                     self.tile_matrix[row][col].is_connected = True
-      # check all the tiles form left to right
-      for row in range(1, self.grid_height):
-         for col in range(1, self.grid_width):
-            if self.tile_matrix[row][col] is None:
-               continue
-            if self.tile_matrix[row][col - 1] is not None:
-               if self.tile_matrix[row][col - 1].is_connected == True:
-                  self.tile_matrix[row][col].is_connected = True
-      # check all the tiles form right to left
-      for row in range(1, self.grid_height):
-         for col in range(self.grid_width - 2, -1, -1):
-            if self.tile_matrix[row][col] is None:
+   # check all the tiles if they are connected to the ground by using a flood
+   # fill that starts from the tiles at the ground and visits each tile once
+   # (two tiles are connected when they are neighbors to the left, right, top
+   # or bottom of each other), when cells (as (row, col) pairs) is not None
+   # the connections of the other tiles are assumed to be up to date and the
+   # flood fill only starts from the given cells
+   def check_connections(self, cells=None):
+      h, w = self.grid_height, self.grid_width
+      # flattened lists are used as they are faster than numpy arrays for
+      # accessing single cells
+      occupied = (self.tile_matrix != 0).ravel().tolist()
+      if cells is None:
+         connected = [False] * (h * w)
+         # tiles at the ground are connected
+         stack = [col for col in range(w) if occupied[col]]
+      else:
+         connected = self.connected.ravel().tolist()
+         stack = []
+         for row, col in cells:
+            index = row * w + col
+            if not occupied[index] or connected[index]:
                continue
-            if self.tile_matrix[row][col + 1] is not None:
-               if self.tile_matrix[row][col + 1].is_connected == True:
-                  self.tile_matrix[row][col].is_connected = True
\ No newline at end of file
+            # the given tiles are connected when they are at the ground or
+            # next to a connected tile
+            if row == 0 or self.has_connected_neighbor(connected, row, col):
+               stack.append(index)
+      for index in stack:
+         connected[index] = True
+      while stack:
+         index = stack.pop()
+         row, col = divmod(index, w)
+         # check the bottom, top, left and right neighbors of the tile
+         for neighbor, is_inside in ((index - w, row > 0),
+                                     (index + w, row < h - 1),
+                                     (index - 1, col > 0),
+                                     (index + 1, col < w - 1)):
+            if is_inside and occupied[neighbor] and not connected[neighbor]:
+               connected[neighbor] = True
+               stack.append(neighbor)
+      self.connected[:] = np.array(connected).reshape(h, w)
+
+   # A method for checking whether the cell with the given row and column
+   # indexes has a connected neighbor in the given flattened connected list
+   def has_connected_neighbor(self, connected, row, col):
+      h, w = self.grid_height, self.grid_width
+      index = row * w + col
+      return ((row > 0 and connected[index - w])
+              or (row < h - 1 and connected[index + w])
+              or (col > 0 and connected[index - 1])
+              or (col < w - 1 and connected[index + 1]))
@@ -0,0 +1,429 @@
+import lib.stddraw as stddraw  # used for displaying the game grid
+from lib.color import Color  # used for coloring the game grid
+from point import Point  # used for tile positions
+from tile_atlas import TileAtlas  # used for drawing the tiles as sprites
+import numpy as np  # fundamental Python module for scientific computing
+
+# A class for drawing a game grid (the model) on the stddraw canvas. All the
+# drawing code lives here so that GameGrid, Tetromino and Tile can be used
+# without importing stddraw (e.g. for headless simulations)
+class GameView:
+   # the background colors of the tiles based on the numbers on them
+   tile_colors = {
+      2: Color(239, 230, 221),
+      4: Color(239, 227, 205),
+      8: Color(245, 179, 127),
+      16: Color(247, 152, 107),
+      32: Color(247, 124, 90),
+      64: Color(247, 93, 59),
+      128: Color(239, 205, 115),
+      256: Color(239, 206, 99),
+      512: Color(239, 198, 82),
+      1024: Color(238, 198, 66),
+      2048: Color(239, 194, 49),
+   }
+   # the background color used for the tiles with larger numbers
+   big_tile_color = Color(61, 58, 51)
+   # the foreground (number) color of the tiles
+   tile_foreground_color = Color(0, 100, 200)
+   # the colors used for the texts next to the game grid and for the numbers
+   # and the frames of the tiles of the next tetromino
+   text_color = Color(255, 255, 255)
+   next_tile_number_color, next_tile_frame_color = Color(30, 30, 30), Color(0, 0, 0)
+   # the value of the boundary thickness (for the boxes around the tiles)
+   tile_boundary_thickness = 0.004
+   # font family and font size used for displaying the tile number
+   tile_font_family, tile_font_size = "Arial", 14
+
+   # A constructor for creating a view of the given game grid
+   def __init__(self, grid):
+      # the game grid displayed by this view
+      self.grid = grid
+      # set the color used for the empty grid cells
+      self.empty_cell_color = Color(45, 45, 45)
+      # set the colors used for the grid lines and the grid boundaries
+      self.line_color = Color(80, 80, 80)
+      self.boundary_color = Color(200, 200, 200)
+      # thickness values used for the grid lines and the grid boundaries
+      self.line_thickness = 0.002
+      self.box_thickness = 5 * self.line_thickness
+      # the display is retained as layers that are rendered separately, each
+      # layer is rendered again only when the state it shows (its key)
+      # changes, and only the changed areas of the composite of the layers
+      # are rendered again and drawn on the canvas
+      self.layers, self.layer_keys = {}, {}
+      self.composite, self.composite_keys = None, None
+      # the rectangles (in pixels) of the drawings on the layers
+      self.layer_rects = {}
+      # False when something else is drawn on the canvas over the display
+      # (see the invalidate method)
+      self.is_canvas_current = False
+      # the tiles are drawn as pre-rendered sprites when use_tile_atlas is True
+      self.use_tile_atlas = True
+      self.tile_atlas = TileAtlas(self.draw_tile)
+      # the tiles on the game grids with at least raster_cell_count cells are
+      # drawn by writing the whole game grid into the pixels of the canvas at
+      # once, by using the colors in tile_palette (indexed by the exponents
+      # of the numbers on the tiles)
+      self.raster_cell_count = 4096
+      self.tile_palette = self.create_tile_palette()
+      # the ghost piece shows where the current tetromino would land
+      self.show_ghost = True
+      self.ghost_color = Color(150, 150, 150)
+      self.ghost_thickness = 0.004
+      # the profiler (see profiler.py) whose summary is shown over the game
+      # while it is enabled, or None
+      self.profiler = None
+
+   # A method for drawing the game grid on the canvas (the drawing is shown
+   # in the window by the stddraw.show or stddraw.showFrame functions)
+   def display(self):
+      # the layers from bottom to top with the methods that draw them
+      layers = (
+         # the parts that never change (the empty cells, the grid lines and
+         # the labels)
+         ("background", self.draw_static_parts),
+         # the tiles locked on the game grid
+         ("tiles", self.draw_grid),
+         # the current/active tetromino and its ghost piece
+         ("tetromino", self.draw_current_tetromino),
+         # the box around the game grid (over the tiles next to the box)
+         ("boundaries", self.draw_boundaries),
+         # the score and the next tetromino
+         ("score", self.draw_score),
+         ("next_tetromino", self.draw_next_tetromino),
+         # the summary of the frame times while the profiler is enabled
+         ("profiler", self.draw_profiler_summary),
+      )
+      keys = self.get_layer_keys()
+      # the area (in pixels) that is changed on any layer
+      area = None
+      for name, draw in layers:
+         changed = self.update_layer(name, keys[name], draw)
+         if changed is not None:
+            area = changed if area is None else area.union(changed)
+      # all the layers are drawn on a new composite layer for a new canvas
+      # size, otherwise only the changed area of the composite is drawn again
+      is_new = (self.composite is None or
+                self.composite_keys["background"] != keys["background"])
+      if is_new:
+         self.composite = stddraw.newLayer(transparent=False)
+      if is_new or area is not None:
+         stddraw.setLayer(self.composite)
+         for name, draw in layers:
+            stddraw.drawLayer(self.layers[name], None if is_new else area)
+         stddraw.setLayer()
+      self.composite_keys = keys
+      # draw only the changed area on the canvas (so that only this area is
+      # updated in the window in the dirty rectangle mode of stddraw), and
+      # nothing when nothing is changed
+      if is_new or not self.is_canvas_current:
+         stddraw.drawLayer(self.composite)
+         self.is_canvas_current = True
+      elif area is not None:
+         stddraw.drawLayer(self.composite, area)
+
+   # A method that must be called after something else is drawn on the canvas
+   # over the display (e.g. the pause message), so that the whole display is
+   # drawn on the canvas again the next time
+   def invalidate(self):
+      self.is_canvas_current = False
+
+   # A method that returns the keys of the layers, i.e., the states that the
+   # layers show (a layer must be rendered again when its key changes)
+   def get_layer_keys(self):
+      grid = self.grid
+      # all the layers must be rendered again when the canvas size or scale
+      # is changed
+      scale = stddraw.getScaleVersion()
+      tetromino = grid.current_tetromino
+      if tetromino is None:
+         tetromino_key = (scale, None)
+      else:
+         tetromino_key = (scale, id(tetromino), tetromino.bottom_left_cell.x,
+                          tetromino.bottom_left_cell.y,
+                          tetromino.rotation_state, grid.version,
+                          self.show_ghost)
+      # the summary of the profiler changes at most every summary_interval
+      # seconds (see profiler.py)
+      if self.profiler is not None and self.profiler.enabled:
+         profiler_summary = self.profiler.get_summary()
+      else:
+         profiler_summary = None
+      return {
+         "background": (scale,),
+         "tiles": (scale, grid.version, self.use_tile_atlas,
+                   self.raster_cell_count),
+         "tetromino": tetromino_key,
+         "boundaries": (scale,),
+         "score": (scale, grid.score),
+         "next_tetromino": (scale, id(grid.next_tetromino)),
+         "profiler": (scale, profiler_summary),
+      }
+
+   # A method for rendering the layer with the given name by using the given
+   # drawing method if its key is changed since the last time it is rendered
+   # (This method returns the changed area in pixels, i.e., the area of the
+   # old and the new drawings on the layer, or None if nothing is changed.)
+   def update_layer(self, name, key, draw):
+      if self.layer_keys.get(name) == key:
+         return None
+      layer = self.layers.get(name)
+      if layer is None or self.layer_keys[name][0] != key[0]:
+         # a new layer is needed for a new canvas size
+         layer = stddraw.newLayer()
+         self.layers[name] = layer
+      stddraw.setLayer(layer)
+      stddraw.clearLayer()
+      draw()
+      rect = stddraw.getDrawnRect()
+      stddraw.setLayer()
+      self.layer_keys[name] = key
+      old_rect = self.layer_rects.get(name)
+      self.layer_rects[name] = rect
+      if old_rect is None:
+         return rect
+      if rect is None:
+         return old_rect
+      return old_rect.union(rect)
+
+   # A method for drawing the parts of the display that never change
+   def draw_static_parts(self):
+      grid = self.grid
+      # clear the background to empty_cell_color
+      stddraw.clear(self.empty_cell_color)
+      # draw the lines of the game grid
+      self.draw_grid_lines()
+      # draw the labels next to the game grid
+      stddraw.setFontFamily("Retro")
+      stddraw.setFontSize(60)
+      stddraw.setPenColor(GameView.text_color)
+      score_text_x = grid.grid_width + 3.5
+      score_text_y = grid.grid_height -3
+      info_pause = grid.grid_height -8
+      stddraw.text(score_text_x, score_text_y, "SCORE")
+      stddraw.setFontSize(30)
+      stddraw.text(score_text_x, info_pause, "P to pause")
+
+   # A method for drawing the current/active tetromino if it is not None
+   # (the case when the game grid is updated)
+   def draw_current_tetromino(self):
+      tetromino = self.grid.current_tetromino
+      if tetromino is not None:
+         if self.show_ghost:
+            self.draw_ghost(tetromino)
+         self.draw_tetromino(tetromino)
+
+   # A method for drawing the scoreboard
+   def draw_score(self):
+      grid = self.grid
+      stddraw.setFontFamily("Retro")
+      stddraw.setFontSize(60)
+      stddraw.setPenColor(GameView.text_color)
+      score_text_x = grid.grid_width + 3.5
+      score_value_y = grid.grid_height -5
+      stddraw.text(score_text_x, score_value_y, str(grid.score))
+
+   # A method for drawing the summary of the frame times measured by the
+   # profiler at the top of the area next to the game grid
+   def draw_profiler_summary(self):
+      if self.profiler is None or not self.profiler.enabled:
+         return  # the profiler is disabled
+      summary = self.profiler.get_summary()
+      if summary is None:
+         return  # no frame is measured yet
+      stddraw.setPenColor(GameView.text_color)
+      stddraw.setFontFamily(GameView.tile_font_family)
+      stddraw.setFontSize(GameView.tile_font_size)
+      stddraw.text(self.grid.grid_width + 3.5, self.grid.grid_height - 1,
+                   summary)
+
+   # A method for drawing the cells of the game grid
+   def draw_grid(self):
+      grid = self.grid
+      # the rows, the columns and the numbers of the occupied cells
+      rows, cols = np.nonzero(grid.tile_matrix)
+      numbers = np.left_shift(1, grid.tile_matrix[rows, cols].astype(int))
+      if grid.grid_height * grid.grid_width >= self.raster_cell_count:
+         self.draw_grid_raster(numbers.tolist(), cols, rows)
+      elif self.use_tile_atlas:
+         for number, row, col in zip(numbers.tolist(), rows.tolist(),
+                                     cols.tolist()):
+            self.tile_atlas.draw(number, Point(col, row))
+      else:
+         self.draw_tiles(numbers.tolist(), cols, rows)
+
+   # A method for drawing the tiles of the game grid by writing the colors of
+   # all the cells into the pixels of the canvas at once, and then drawing the
+   # given numbers at the given x and y coordinates (this draws the same as
+   # the draw_tiles method, but the time does not grow with the number of
+   # cells except for drawing the numbers, which are left out when the tiles
+   # are too small for them)
+   def draw_grid_raster(self, numbers, xs, ys):
+      # draw the tiles as filled squares with the bounding boxes around them
+      stddraw.setPenRadius(GameView.tile_boundary_thickness)
+      stddraw.filledCells(self.grid.tile_matrix, self.tile_palette, -0.5, -0.5,
+                          1, stddraw.BLACK)
+      stddraw.setPenRadius()  # reset the pen radius to its default value
+      # draw the numbers on the tiles only when they fit in the tiles
+      if min(stddraw.getPixelsPerUnit()) < GameView.tile_font_size:
+         return
+      stddraw.setPenColor(GameView.tile_foreground_color)
+      stddraw.setFontFamily(GameView.tile_font_family)
+      stddraw.setFontSize(GameView.tile_font_size)
+      stddraw.texts(xs, ys, [str(number) for number in numbers])
+
+   # A method that returns the background colors of the tiles as an array of
+   # (r, g, b, a) rows indexed by the exponents of the numbers on the tiles
+   # (the exponent 0 is used for the empty cells, which are transparent)
+   def create_tile_palette(self):
+      palette = np.zeros((256, 4), dtype=np.uint8)
+      for exponent in range(1, 256):
+         color = GameView.tile_colors.get(1 << exponent,
+                                          GameView.big_tile_color)
+         palette[exponent] = (color.getRed(), color.getGreen(),
+                              color.getBlue(), 255)
+      return palette
+
+   # A method for drawing the lines of the game grid
+   def draw_grid_lines(self):
+      grid = self.grid
+      # draw the inner lines of the game grid
+      stddraw.setPenColor(self.line_color)
+      stddraw.setPenRadius(self.line_thickness)
+      # x and y ranges for the game grid
+      start_x, end_x = -0.5, grid.grid_width - 0.5
+      start_y, end_y = -0.5, grid.grid_height - 0.5
+      xs = np.arange(start_x + 1, end_x, 1)  # vertical inner lines
+      ys = np.arange(start_y + 1, end_y, 1)  # horizontal inner lines
+      # the lines as (x0, y0, x1, y1) rows drawn in a single call
+      segments = np.concatenate((
+         np.column_stack((xs, np.full_like(xs, start_y), xs,
+                          np.full_like(xs, end_y))),
+         np.column_stack((np.full_like(ys, start_x), ys,
+                          np.full_like(ys, end_x), ys))))
+      stddraw.lines(segments)
+      stddraw.setPenRadius()  # reset the pen radius to its default value
+
+   # A method for drawing the boundaries around the game grid
+   def draw_boundaries(self):
+      # draw a bounding box around the game grid as a rectangle
+      stddraw.setPenColor(self.boundary_color)  # using boundary_color
+      # set the pen radius as box_thickness (half of this thickness is visible
+      # for the bounding box as its lines lie on the boundaries of the canvas)
+      stddraw.setPenRadius(self.box_thickness)
+      # the coordinates of the bottom left corner of the game grid
+      pos_x, pos_y = -0.5, -0.5
+      stddraw.rectangle(pos_x, pos_y, self.grid.grid_width,
+                        self.grid.grid_height)
+      stddraw.setPenRadius()  # reset the pen radius to its default value
+
+   # A method for drawing the next tetromino next to the game grid
+   def draw_next_tetromino(self):
+      next_tetromino = self.grid.next_tetromino
+      # the numbers on the next tetromino are drawn with the font size 30
+      stddraw.setFontFamily("Retro")
+      stddraw.setFontSize(30)
+      base_x = self.grid.grid_width + 0.7
+      base_y = self.grid.grid_height - 20
+      grid_size = 4
+      tile_size = 1.5
+
+      # calcute size of tetromino
+      tetromino_width = tetromino_height = next_tetromino.n
+
+      # draw tetromino
+      for tile, (row, col) in zip(next_tetromino.tiles, next_tetromino.get_cells()):
+         draw_x = base_x + (col + (grid_size - tetromino_width) / 2) * tile_size + tile_size / 2
+         draw_y = base_y + (grid_size - 1 - row - (grid_size - tetromino_height) / 2) * tile_size + tile_size / 2
+
+         # fill the background of every cell with appropaite color
+         stddraw.setPenColor(GameView.tile_colors[tile.number])
+
+         stddraw.filledSquare(draw_x, draw_y, tile_size / 2)
+
+         # show number of the tile
+         stddraw.setPenColor(GameView.next_tile_number_color)
+         stddraw.text(draw_x, draw_y, str(tile.number))
+
+         # draw frame for each tile
+         stddraw.setPenColor(GameView.next_tile_frame_color)  # set frame color black
+         stddraw.setPenRadius(0.005)  # thickness of frame
+         stddraw.rectangle(draw_x - tile_size / 2, draw_y - tile_size / 2, tile_size, tile_size)
+
+      # reset thickness
+      stddraw.setPenRadius()
+
+   # A method for drawing the given tetromino on the game grid
+   def draw_tetromino(self, tetromino):
+      # draw only the tiles that are inside the game grid
+      tiles = [(tile.number, x, y) for tile, (x, y) in
+               zip(tetromino.tiles, tetromino.get_tile_positions())
+               if y < self.grid.grid_height]
+      if self.use_tile_atlas:
+         for number, x, y in tiles:
+            self.tile_atlas.draw(number, Point(x, y))
+      elif tiles:
+         numbers, xs, ys = zip(*tiles)
+         self.draw_tiles(numbers, xs, ys)
+
+   # A method for drawing the outline of the given tetromino at the position
+   # that it would land on when it is dropped
+   def draw_ghost(self, tetromino):
+      # the drop distance is cached by the tetromino until it is moved or
+      # rotated or the game grid is updated
+      distance = tetromino.cached_drop_distance(self.grid)
+      if distance == 0:
+         return  # the ghost piece would be under the tetromino
+      # draw only the tiles that are inside the game grid
+      positions = [(x, y - distance) for x, y in tetromino.get_tile_positions()
+                   if y - distance < self.grid.grid_height]
+      if not positions:
+         return
+      xs, ys = zip(*positions)
+      stddraw.setPenColor(self.ghost_color)
+      stddraw.setPenRadius(self.ghost_thickness)
+      stddraw.squares(xs, ys, 0.5)
+      stddraw.setPenRadius()  # reset the pen radius to its default value
+
+   # A method for drawing the tiles with the given numbers at the given x and
+   # y coordinates (this draws the same as calling draw_tile for each tile,
+   # but the squares of all the tiles are drawn in single calls)
+   def draw_tiles(self, numbers, xs, ys):
+      if len(numbers) == 0:
+         return
+      # the background colors are determined by the numbers on the tiles
+      colors = [GameView.tile_colors.get(number, GameView.big_tile_color)
+                for number in numbers]
+      stddraw.filledSquares(xs, ys, 0.5, colors)
+      # draw the bounding boxes around the tiles as squares
+      stddraw.setPenColor(stddraw.BLACK)
+      stddraw.setPenRadius(GameView.tile_boundary_thickness)
+      stddraw.squares(xs, ys, 0.5)
+      stddraw.setPenRadius()  # reset the pen radius to its default value
+      # draw the numbers on the tiles
+      stddraw.setPenColor(GameView.tile_foreground_color)
+      stddraw.setFontFamily(GameView.tile_font_family)
+      stddraw.setFontSize(GameView.tile_font_size)
+      for number, x, y in zip(numbers, xs, ys):
+         stddraw.text(x, y, str(number))
+
+   # A method for drawing a tile with the given number at a given position
+   # with a given length
+   def draw_tile(self, number, position, length=1):  # length defaults to 1
+      # the background color is determined by the number on the tile
+      background_color = GameView.tile_colors.get(number,
+                                                  GameView.big_tile_color)
+      # draw the tile as a filled square
+      stddraw.setPenColor(background_color)
+      stddraw.filledSquare(position.x, position.y, length / 2)
+      # draw the bounding box around the tile as a square
+      stddraw.setPenColor(stddraw.BLACK)
+      stddraw.setPenRadius(GameView.tile_boundary_thickness)
+      stddraw.square(position.x, position.y, length / 2)
+      stddraw.setPenRadius()  # reset the pen radius to its default value
+      # draw the number on the tile
+      stddraw.setPenColor(GameView.tile_foreground_color)
+      stddraw.setFontFamily(GameView.tile_font_family)
+      stddraw.setFontSize(GameView.tile_font_size)
+      stddraw.text(position.x, position.y, str(number))
@@ -9,19 +9,67 @@ objects.
 
 class Color:
     """
-    A Color object models an RGB color.
+    A Color object models an RGB color. Color objects are immutable,
+    so they can be shared and used as dictionary keys. The Color
+    objects with the same components are interned, that is,
+    Color(r, g, b) returns the same object for the same r, g and b
+    (up to _MAX_INTERNED different colors).
     """
 
+    __slots__ = ('_r', '_g', '_b', '_hash')
+
+    # The interned Color objects keyed by their (r, g, b) components.
+    _interned = {}
+    _MAX_INTERNED = 4096
+
     #-------------------------------------------------------------------
 
-    def __init__(self, r=0, g=0, b=0):
+    def __new__(cls, r=0, g=0, b=0):
         """
         Construct self such that it has the given red (r),
         green (g), and blue (b) components.
         """
-        self._r = r  # Red component
-        self._g = g  # Green component
-        self._b = b  # Blue component
+        key = (r, g, b)
+        c = Color._interned.get(key)
+        if c is not None and type(c) is cls:
+            return c
+        c = object.__new__(cls)
+        object.__setattr__(c, '_r', r)  # Red component
+        object.__setattr__(c, '_g', g)  # Green component
+        object.__setattr__(c, '_b', b)  # Blue component
+        object.__setattr__(c, '_hash', hash(key))
+        if cls is Color and len(Color._interned) < Color._MAX_INTERNED:
+            Color._interned[key] = c
+        return c
+
+    #-------------------------------------------------------------------
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Color objects are immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('Color objects are immutable')
+
+    def __reduce__(self):
+        # Copy and pickle self by constructing (or interning) it again.
+        return (type(self), (self._r, self._g, self._b))
+
+    #-------------------------------------------------------------------
+
+    def __eq__(self, other):
+        """
+        Return True if self and other have the same components.
+        """
+        if not isinstance(other, Color):
+            return NotImplemented
+        return (self._r == other._r and self._g == other._g and
+            self._b == other._b)
+
+    def __hash__(self):
+        """
+        Return the hash of self, computed once from its components.
+        """
+        return self._hash
 
     #-------------------------------------------------------------------
 
@@ -10,20 +10,24 @@ commonly used Color objects defined in the color module.
 import time
 import os
 import sys
+import collections
+import numpy as np
 
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = 'hide'
 import pygame
 import pygame.gfxdraw
 import pygame.font
 
-import tkinter as Tkinter
-import tkinter.messagebox as tkMessageBox
-import tkinter.filedialog as tkFileDialog
-	
+# tkinter is imported only by the child processes that display the dialog
+# boxes (see _getFileName), and the pygame font module is initialized when
+# the first font is created (see _getFont), so importing stddraw is fast and
+# does not need Tk.
+
 #-----------------------------------------------------------------------
 
 # Define colors so clients need not import the color module.
 try:
+    from lib.color import Color
     from lib.color import WHITE
     from lib.color import BLACK
     from lib.color import RED
@@ -45,6 +49,7 @@ try:
     from lib.color import BOOK_LIGHT_BLUE
     from lib.color import BOOK_RED
 except ModuleNotFoundError:
+    from color import Color
     from color import WHITE
     from color import BLACK
     from color import RED
@@ -82,6 +87,8 @@ _DEFAULT_PEN_COLOR = BLACK
 
 _DEFAULT_FONT_FAMILY = 'Helvetica'
 _DEFAULT_FONT_SIZE = 12
+_FONT_CACHE_SIZE = 32
+_TEXT_CACHE_SIZE = 256
 
 _xmin = None
 _ymin = None
@@ -91,15 +98,81 @@ _ymax = None
 _fontFamily = _DEFAULT_FONT_FAMILY
 _fontSize = _DEFAULT_FONT_SIZE
 
+# The pygame fonts created so far, keyed by (family, size, bold), in least
+# recently used order, and the fonts for the current family and size,
+# keyed by bold.
+_fontCache = collections.OrderedDict()
+_currentFonts = {}
+
+# The rendered text surfaces, keyed by (string, family, size, bold,
+# color), in least recently used order.
+_textCache = collections.OrderedDict()
+
 _canvasWidth = float(_DEFAULT_CANVAS_SIZE)
 _canvasHeight = float(_DEFAULT_CANVAS_SIZE)
 _penRadius = None
 _penColor = _DEFAULT_PEN_COLOR
-_keysTyped = []
+
+# Is the dirty rectangle mode on? In this mode, the drawing functions
+# record the rectangles of the canvas they change, and show copies only
+# these rectangles to the window.
+_dirtyRectMode = False
+_dirtyRects = []
+
+# Was the window uncovered or restored since the last call of show? Then
+# the whole window must be drawn again.
+_windowExposed = False
+
+# The pygame events for uncovering or restoring the window (the window
+# events are missing in pygame 1, so VIDEOEXPOSE is used instead).
+_EXPOSE_EVENTS = frozenset(getattr(pygame, name, pygame.VIDEOEXPOSE)
+                           for name in ('VIDEOEXPOSE', 'WINDOWEXPOSED',
+                                        'WINDOWRESTORED'))
+
+# The smallest rectangle that contains everything drawn on the current
+# surface (the layer set by setLayer or the canvas) since it was set or
+# cleared, or None if nothing was drawn.
+_drawnRect = None
+
+# The number of changes to the canvas size and the x and y scales, so that
+# clients can tell when the sprites they rendered must be rendered again.
+_scaleVersion = 0
+
+# The queue of the keys that the user typed as (key, time) pairs, where
+# time is when the key was typed in milliseconds (see _ticks).
+_keysTyped = collections.deque()
+
+# The delay before a held key repeats and the interval between the repeats
+# in milliseconds (a delay of 0 means no key repeat), and the keys that
+# repeat (None for all keys).
+_repeatDelay = 0
+_repeatInterval = 0
+_repeatKeys = None
+
+# The held keys that repeat, mapped to the time of their next repeat.
+_keysHeld = {}
+
+# The backends that stddraw can draw with: 'window' shows the drawing in a
+# window, 'offscreen' draws on a canvas that is never shown (using the SDL
+# dummy video driver, so no display is needed, e.g. for saving the drawing
+# to files), and 'null' draws nothing (e.g. for measuring the time spent in
+# the drawing code). The backend can be set by the STDDRAW_BACKEND
+# environment variable or by setBackend.
+_BACKENDS = ('window', 'offscreen', 'null')
+_backend = os.environ.get('STDDRAW_BACKEND', 'window')
+if _backend not in _BACKENDS:
+    raise Exception('STDDRAW_BACKEND must be one of ' + ', '.join(_BACKENDS))
 
 # Has the window been created?
 _windowCreated = False
 
+# The clock used by showFrame for keeping the frame rate.
+_clock = None
+
+# The background canvas (the drawing functions draw on _surface, which is
+# either the canvas or a layer set by setLayer).
+_canvas = None
+
 #-----------------------------------------------------------------------
 # Begin added by Alan J. Broder
 #-----------------------------------------------------------------------
@@ -118,15 +191,23 @@ _mousePos = None
 
 #-----------------------------------------------------------------------
 
+# The pygame.Color objects converted from the color.Color objects.
+_pygameColors = {}
+_MAX_PYGAME_COLORS = 4096
+
 def _pygameColor(c):
     """
     Convert c, an object of type color.Color, to an equivalent object
-    of type pygame.Color.  Return the result.
+    of type pygame.Color.  Return the result, which is shared by all
+    the calls with the same color and must not be modified.
     """
-    r = c.getRed()
-    g = c.getGreen()
-    b = c.getBlue()
-    return pygame.Color(r, g, b)
+    pc = _pygameColors.get(c)
+    if pc is None:
+        if len(_pygameColors) >= _MAX_PYGAME_COLORS:
+            _pygameColors.clear()
+        pc = pygame.Color(c.getRed(), c.getGreen(), c.getBlue())
+        _pygameColors[c] = pc
+    return pc
 
 #-----------------------------------------------------------------------
 
@@ -168,9 +249,12 @@ def setCanvasSize(w=_DEFAULT_CANVAS_SIZE, h=_DEFAULT_CANVAS_SIZE):
     """
     global _background
     global _surface
+    global _canvas
+    global _dirtyRects
     global _canvasWidth
     global _canvasHeight
     global _windowCreated
+    global _scaleVersion
 
     if _windowCreated:
         raise Exception('The stddraw window already was created')
@@ -180,11 +264,19 @@ def setCanvasSize(w=_DEFAULT_CANVAS_SIZE, h=_DEFAULT_CANVAS_SIZE):
 
     _canvasWidth = w
     _canvasHeight = h
-    _background = pygame.display.set_mode([w, h])
-    pygame.display.set_caption('stddraw window (r-click to save)')
-    _surface = pygame.Surface((w, h))
+    if _backend == 'null':
+        _background = None
+    else:
+        if _backend == 'offscreen':
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        _background = pygame.display.set_mode([w, h])
+        pygame.display.set_caption('stddraw window (r-click to save)')
+    _surface = _newSurface((w, h))
     _surface.fill(_pygameColor(WHITE))
+    _canvas = _surface
+    _dirtyRects = [_canvas.get_rect()]
     _windowCreated = True
+    _scaleVersion += 1
 
 def setXscale(min=_DEFAULT_XMIN, max=_DEFAULT_XMAX):
     """
@@ -193,6 +285,7 @@ def setXscale(min=_DEFAULT_XMIN, max=_DEFAULT_XMAX):
     """
     global _xmin
     global _xmax
+    global _scaleVersion
     min = float(min)
     max = float(max)
     if min >= max:
@@ -200,6 +293,7 @@ def setXscale(min=_DEFAULT_XMIN, max=_DEFAULT_XMAX):
     size = max - min
     _xmin = min - _BORDER * size
     _xmax = max + _BORDER * size
+    _scaleVersion += 1
 
 def setYscale(min=_DEFAULT_YMIN, max=_DEFAULT_YMAX):
     """
@@ -208,6 +302,7 @@ def setYscale(min=_DEFAULT_YMIN, max=_DEFAULT_YMAX):
     """
     global _ymin
     global _ymax
+    global _scaleVersion
     min = float(min)
     max = float(max)
     if min >= max:
@@ -215,6 +310,21 @@ def setYscale(min=_DEFAULT_YMIN, max=_DEFAULT_YMAX):
     size = max - min
     _ymin = min - _BORDER * size
     _ymax = max + _BORDER * size
+    _scaleVersion += 1
+
+def getScaleVersion():
+    """
+    Return a number that changes whenever the canvas size, the x-scale
+    or the y-scale changes.
+    """
+    return _scaleVersion
+
+def getPixelsPerUnit():
+    """
+    Return the number of pixels on the canvas per unit of the x-scale
+    and per unit of the y-scale as a pair.
+    """
+    return _factorX(1.0), _factorY(1.0)
 
 def setPenRadius(r=_DEFAULT_PEN_RADIUS):
     """
@@ -243,6 +353,7 @@ def setFontFamily(f=_DEFAULT_FONT_FAMILY):
     """
     global _fontFamily
     _fontFamily = f
+    _currentFonts.clear()
 
 def setFontSize(s=_DEFAULT_FONT_SIZE):
     """
@@ -250,9 +361,47 @@ def setFontSize(s=_DEFAULT_FONT_SIZE):
     """
     global _fontSize
     _fontSize = s
+    _currentFonts.clear()
+
+def clearFontCache():
+    """
+    Discard all the fonts that were created for drawing text.
+    """
+    _fontCache.clear()
+    _currentFonts.clear()
+    _textCache.clear()
 
 #-----------------------------------------------------------------------
 
+def setBackend(backend='window'):
+    """
+    Set the backend that stddraw draws with to 'window', 'offscreen' or
+    'null' (see _BACKENDS). If you call this function, you must do so
+    before calling any drawing function.
+    """
+    global _backend
+    if _windowCreated:
+        raise Exception('The stddraw window already was created')
+    if backend not in _BACKENDS:
+        raise Exception('backend must be one of ' + ', '.join(_BACKENDS))
+    _backend = backend
+
+def getBackend():
+    """
+    Return the backend that stddraw draws with.
+    """
+    return _backend
+
+def _newSurface(size, flags=0):
+    """
+    Return a new surface with the given size (a (width, height) pair)
+    and flags. With the null backend, the surface is empty, so that
+    drawing on it does nothing.
+    """
+    if _backend == 'null':
+        size = (0, 0)
+    return pygame.Surface(size, flags)
+
 def _makeSureWindowCreated():
     global _windowCreated
     if not _windowCreated:
@@ -261,20 +410,99 @@ def _makeSureWindowCreated():
 
 #-----------------------------------------------------------------------
 
+def setDirtyRectMode(enabled=True):
+    """
+    Turn the dirty rectangle mode on if enabled is True and off
+    otherwise. In this mode, show updates only the parts of the window
+    that were drawn on since the last call of show, instead of the whole
+    window.
+    """
+    global _dirtyRectMode
+    global _dirtyRects
+    _dirtyRectMode = enabled
+    # Update the whole window the next time.
+    _dirtyRects = [pygame.Rect(0, 0, int(_canvasWidth), int(_canvasHeight))]
+
+def _markDirty(rect):
+    """
+    Record rect, the rectangle changed by a drawing function, if the
+    dirty rectangle mode is on and the drawing is on the canvas. Also
+    add rect to the rectangle drawn on the current surface.
+    """
+    global _drawnRect
+    if _dirtyRectMode and _surface is _canvas:
+        _dirtyRects.append(rect)
+    rect = pygame.Rect(rect)
+    if rect.width <= 0 or rect.height <= 0:
+        return
+    if _drawnRect is None:
+        _drawnRect = rect
+    else:
+        _drawnRect.union_ip(rect)
+
+#-----------------------------------------------------------------------
+
+def _getFont(bold=False):
+    """
+    Return the pygame font for the current font family and font size,
+    creating it only if it is not in the font cache.
+    """
+    font = _currentFonts.get(bold)
+    if font is not None:
+        return font
+    key = (_fontFamily, _fontSize, bold)
+    font = _fontCache.get(key)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.SysFont(_fontFamily, _fontSize, bold)
+        _fontCache[key] = font
+        # Evict the least recently used font if the cache is full.
+        if len(_fontCache) > _FONT_CACHE_SIZE:
+            _fontCache.popitem(last=False)
+    else:
+        _fontCache.move_to_end(key)
+    _currentFonts[bold] = font
+    return font
+
+def _renderText(s, bold=False):
+    """
+    Return a surface with string s rendered in the current font and
+    pen color, rendering it only if it is not in the text cache.
+    """
+    c = _penColor
+    key = (s, _fontFamily, _fontSize, bold, c)
+    surface = _textCache.get(key)
+    if surface is None:
+        surface = _getFont(bold).render(s, 1, _pygameColor(c))
+        _textCache[key] = surface
+        # Evict the least recently used surface if the cache is full.
+        if len(_textCache) > _TEXT_CACHE_SIZE:
+            _textCache.popitem(last=False)
+    else:
+        _textCache.move_to_end(key)
+    return surface
+
+#-----------------------------------------------------------------------
+
 # Functions to draw shapes, text, and images on the background canvas.
 
-def _pixel(x, y):
+def _pixel(x, y, color=None):
     """
-    Draw on the background canvas a pixel at (x, y).
+    Draw on the background canvas a pixel at (x, y) with the pygame
+    color color, or with the pen color if color is None.
     """
     _makeSureWindowCreated()
+    if color is None:
+        color = _pygameColor(_penColor)
     xs = _scaleX(x)
     xy = _scaleY(y)
     pygame.gfxdraw.pixel(
         _surface,
         int(round(xs)),
         int(round(xy)),
-        _pygameColor(_penColor))
+        color)
+    _markDirty(pygame.Rect(int(round(xs)), int(round(xy)), 1, 1))
 
 def point(x, y):
     """
@@ -289,7 +517,7 @@ def point(x, y):
     else:
         xs = _scaleX(x)
         ys = _scaleY(y)
-        pygame.draw.ellipse(
+        _markDirty(pygame.draw.ellipse(
             _surface,
             _pygameColor(_penColor),
             pygame.Rect(
@@ -297,7 +525,7 @@ def point(x, y):
                 ys-_penRadius,
                 _penRadius*2.0,
                 _penRadius*2.0),
-            0)
+            0))
 
 def line(x0, y0, x1, y1):
     """
@@ -317,12 +545,33 @@ def line(x0, y0, x1, y1):
     y0s = _scaleY(y0)
     x1s = _scaleX(x1)
     y1s = _scaleY(y1)
-    pygame.draw.line(
+    _markDirty(pygame.draw.line(
        _surface,
        _pygameColor(_penColor),
        (x0s, y0s),
        (x1s, y1s),
-       int(round(lineWidth)))
+       int(round(lineWidth))))
+
+def lines(segments):
+    """
+    Draw on the background canvas the lines from (x0, y0) to (x1, y1)
+    for each (x0, y0, x1, y1) row of segments, a sequence or a NumPy
+    array with 4 columns. The coordinates are scaled all at once.
+    """
+    _makeSureWindowCreated()
+    segments = np.asarray(segments, dtype=float).reshape(-1, 4)
+    lineWidth = _penRadius
+    if lineWidth == 0.0: lineWidth = 1.0
+    lineWidth = int(round(lineWidth))
+    x0s = _scaleX(segments[:, 0]).tolist()
+    y0s = _scaleY(segments[:, 1]).tolist()
+    x1s = _scaleX(segments[:, 2]).tolist()
+    y1s = _scaleY(segments[:, 3]).tolist()
+    color = _pygameColor(_penColor)
+    drawLine = pygame.draw.line
+    for i in range(len(x0s)):
+        _markDirty(drawLine(_surface, color, (x0s[i], y0s[i]),
+            (x1s[i], y1s[i]), lineWidth))
 
 def circle(x, y, r):
     """
@@ -341,11 +590,11 @@ def circle(x, y, r):
     else:
         xs = _scaleX(x)
         ys = _scaleY(y)
-        pygame.draw.ellipse(
+        _markDirty(pygame.draw.ellipse(
             _surface,
             _pygameColor(_penColor),
             pygame.Rect(xs-ws/2.0, ys-hs/2.0, ws, hs),
-            int(round(_penRadius)))
+            int(round(_penRadius))))
 
 def filledCircle(x, y, r):
     """
@@ -364,11 +613,11 @@ def filledCircle(x, y, r):
     else:
         xs = _scaleX(x)
         ys = _scaleY(y)
-        pygame.draw.ellipse(
+        _markDirty(pygame.draw.ellipse(
             _surface,
             _pygameColor(_penColor),
             pygame.Rect(xs-ws/2.0, ys-hs/2.0, ws, hs),
-            0)
+            0))
 
 def rectangle(x, y, w, h):
     """
@@ -389,11 +638,11 @@ def rectangle(x, y, w, h):
     else:
         xs = _scaleX(x)
         ys = _scaleY(y)
-        pygame.draw.rect(
+        _markDirty(pygame.draw.rect(
             _surface,
             _pygameColor(_penColor),
             pygame.Rect(xs, ys-hs, ws, hs),
-            int(round(_penRadius)))
+            int(round(_penRadius))))
 
 def filledRectangle(x, y, w, h):
     """
@@ -414,11 +663,11 @@ def filledRectangle(x, y, w, h):
     else:
         xs = _scaleX(x)
         ys = _scaleY(y)
-        pygame.draw.rect(
+        _markDirty(pygame.draw.rect(
             _surface,
             _pygameColor(_penColor),
             pygame.Rect(xs, ys-hs, ws, hs),
-            0)
+            0))
 
 def square(x, y, r):
     """
@@ -436,6 +685,171 @@ def filledSquare(x, y, r):
     _makeSureWindowCreated()
     filledRectangle(x-r, y-r, 2.0*r, 2.0*r)
 
+def _squareRects(xs, ys, r):
+    """
+    Return the pixel rectangles of the squares whose sides are of
+    length 2r, centered on (xs[i], ys[i]), as (left, top, width,
+    height) lists, or None if the squares are too small to draw as
+    rectangles. The coordinates are scaled all at once.
+    """
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    r = float(r)
+    ws = _factorX(2.0*r)
+    hs = _factorY(2.0*r)
+    if (ws <= 1.0) and (hs <= 1.0):
+        return None
+    # pygame.Rect truncates the coordinates and the sizes to integers.
+    lefts = _scaleX(xs - r).astype(int).tolist()
+    tops = (_scaleY(ys - r) - hs).astype(int).tolist()
+    return lefts, tops, int(ws), int(hs)
+
+def _colorList(colors, n):
+    """
+    Return a list of n pygame colors for colors, which is None for the
+    pen color, a color.Color object, or a sequence of n color.Color
+    objects.
+    """
+    if colors is None:
+        colors = _penColor
+    if isinstance(colors, Color):
+        return [_pygameColor(colors)] * n
+    return [_pygameColor(c) for c in colors]
+
+def filledSquares(xs, ys, r, colors=None):
+    """
+    Draw on the background canvas the filled squares whose sides are
+    of length 2r, centered on (xs[i], ys[i]), where xs and ys are
+    sequences or NumPy arrays. The squares are drawn with the colors
+    in colors, a sequence of color.Color objects, or with the color
+    colors if it is a color.Color object, or with the pen color if
+    colors is None. This is the same as calling filledSquare for each
+    square, but the coordinates are scaled all at once.
+    """
+    _makeSureWindowCreated()
+    rects = _squareRects(xs, ys, r)
+    n = len(xs)
+    colorList = _colorList(colors, n)
+    if rects is None:
+        # The squares are too small, so simply draw pixels.
+        for i in range(n):
+            _pixel(float(xs[i]), float(ys[i]), colorList[i])
+        return
+    lefts, tops, ws, hs = rects
+    fill = _surface.fill
+    for i in range(n):
+        _markDirty(fill(colorList[i], (lefts[i], tops[i], ws, hs)))
+
+def squares(xs, ys, r):
+    """
+    Draw on the background canvas the squares whose sides are of
+    length 2r, centered on (xs[i], ys[i]), where xs and ys are
+    sequences or NumPy arrays. This is the same as calling square for
+    each square, but the coordinates are scaled all at once.
+    """
+    _makeSureWindowCreated()
+    rects = _squareRects(xs, ys, r)
+    if rects is None:
+        # The squares are too small, so simply draw pixels.
+        for i in range(len(xs)):
+            _pixel(float(xs[i]), float(ys[i]))
+        return
+    lefts, tops, ws, hs = rects
+    color = _pygameColor(_penColor)
+    width = int(round(_penRadius))
+    drawRect = pygame.draw.rect
+    for i in range(len(lefts)):
+        _markDirty(drawRect(_surface, color,
+            (lefts[i], tops[i], ws, hs), width))
+
+def _cellIndexes(starts, size, pixels):
+    """
+    Return the index of the cell that each pixel in pixels is in, and
+    the offsets of the pixels in their cells, where the cells are
+    size pixels long and start at the increasing pixel positions in
+    starts. The index is -1 for the pixels that are not in any cell.
+    """
+    indexes = np.searchsorted(starts, pixels, side='right') - 1
+    offsets = pixels - starts[np.maximum(indexes, 0)]
+    indexes[(indexes < 0) | (offsets >= size)] = -1
+    return indexes, offsets
+
+def filledCells(values, palette, x, y, size=1.0, borderColor=None):
+    """
+    Draw on the background canvas the 2-D array values as a grid of
+    filled squares whose sides are of length size, such that the
+    lower left point of the square of values[0][0] is (x, y), and the
+    square of values[row][col] is col squares to the right and row
+    squares above it. The square of each value v is drawn with the
+    color palette[v], where palette is an array of (r, g, b, a) rows,
+    and the squares with the alpha a = 0 are not drawn. If borderColor
+    is not None, the squares are outlined with this color.Color using
+    the pen radius. This draws the same as calling filledSquare (and
+    square) for each square, but the whole grid is written into the
+    pixels of the canvas at once.
+    """
+    _makeSureWindowCreated()
+    values = np.asarray(values)
+    palette = np.asarray(palette, dtype=np.uint8)
+    rows, cols = values.shape
+    size = float(size)
+    ws = int(_factorX(size))
+    hs = int(_factorY(size))
+    # The pixel positions of the left sides of the columns and the top
+    # sides of the rows (from the top row), truncated like pygame.Rect.
+    lefts = _scaleX(x + size * np.arange(cols)).astype(int)
+    tops = (_scaleY(y + size * np.arange(rows)[::-1]) -
+        _factorY(size)).astype(int)
+    width, height = _surface.get_size()
+    x0 = max(int(lefts[0]), 0)
+    x1 = min(int(lefts[-1]) + ws, width)
+    y0 = max(int(tops[0]), 0)
+    y1 = min(int(tops[-1]) + hs, height)
+    if (x0 >= x1) or (y0 >= y1) or (ws < 1) or (hs < 1):
+        return
+    # The column and the row of the cell at each pixel of the region.
+    pixelCols, offsetsX = _cellIndexes(lefts, ws, np.arange(x0, x1))
+    pixelRows, offsetsY = _cellIndexes(tops, hs, np.arange(y0, y1))
+    pixelRows[pixelRows >= 0] = rows - 1 - pixelRows[pixelRows >= 0]
+    # Write the pixels directly into the surface if it has 32-bit pixels,
+    # and into a new transparent surface drawn on it otherwise.
+    if _surface.get_bytesize() == 4:
+        target = _surface
+        pixels = pygame.surfarray.pixels2d(target)[x0:x1, y0:y1]
+    else:
+        target = pygame.Surface((x1 - x0, y1 - y0), pygame.SRCALPHA)
+        pixels = pygame.surfarray.pixels2d(target)
+    # The pixel values of the palette colors (map_rgb may return them as
+    # negative numbers, which are converted to the unsigned pixel values).
+    mapped = np.array([target.map_rgb(tuple(c)) for c in palette.tolist()],
+        dtype=np.int64).astype(pixels.dtype)
+    # The pixel values of the cells and whether they are drawn (indexed as
+    # [col][row] like pygame.surfarray) with an extra last column and row
+    # that are not drawn for the pixels that are not in any cell (their
+    # index is -1).
+    cellPixels = np.zeros((cols + 1, rows + 1), dtype=pixels.dtype)
+    cellPixels[:cols, :rows] = mapped[values.T]
+    cellDrawn = np.zeros((cols + 1, rows + 1), dtype=bool)
+    cellDrawn[:cols, :rows] = palette[values.T, 3] > 0
+    # The pixel values of the region and whether they are drawn.
+    colors = np.take(np.take(cellPixels, pixelCols, 0), pixelRows, 1)
+    drawn = np.take(np.take(cellDrawn, pixelCols, 0), pixelRows, 1)
+    if borderColor is not None:
+        borderWidth = int(round(_penRadius))
+        edgesX = (offsetsX < borderWidth) | (offsetsX >= ws - borderWidth)
+        edgesY = (offsetsY < borderWidth) | (offsetsY >= hs - borderWidth)
+        # Only the pixels of the drawn squares are copied below.
+        c = borderColor
+        borderPixel = np.int64(target.map_rgb((c.getRed(), c.getGreen(),
+            c.getBlue(), 255))).astype(pixels.dtype)
+        colors[edgesX] = borderPixel
+        colors[:, edgesY] = borderPixel
+    np.copyto(pixels, colors, where=drawn)
+    del pixels  # unlock the surface
+    if target is not _surface:
+        _surface.blit(target, (x0, y0))
+    _markDirty(pygame.Rect(x0, y0, x1 - x0, y1 - y0))
+
 def polygon(x, y):
     """
     Draw on the background canvas a polygon with coordinates
@@ -454,11 +868,11 @@ def polygon(x, y):
     for i in range(len(x)):
         points.append((xScaled[i], yScaled[i]))
     points.append((xScaled[0], yScaled[0]))
-    pygame.draw.polygon(
+    _markDirty(pygame.draw.polygon(
         _surface,
         _pygameColor(_penColor),
         points,
-        int(round(_penRadius)))
+        int(round(_penRadius))))
 
 def filledPolygon(x, y):
     """
@@ -478,7 +892,7 @@ def filledPolygon(x, y):
     for i in range(len(x)):
         points.append((xScaled[i], yScaled[i]))
     points.append((xScaled[0], yScaled[0]))
-    pygame.draw.polygon(_surface, _pygameColor(_penColor), points, 0)
+    _markDirty(pygame.draw.polygon(_surface, _pygameColor(_penColor), points, 0))
 
 def text(x, y, s):
     """
@@ -489,10 +903,26 @@ def text(x, y, s):
     y = float(y)
     xs = _scaleX(x)
     ys = _scaleY(y)
-    font = pygame.font.SysFont(_fontFamily, _fontSize)
-    text = font.render(s, 1, _pygameColor(_penColor))
+    text = _renderText(s)
     textpos = text.get_rect(center=(xs, ys))
-    _surface.blit(text, textpos)
+    _markDirty(_surface.blit(text, textpos))
+
+def texts(xs, ys, strings):
+    """
+    Draw on the background canvas each string strings[i] centered at
+    (xs[i], ys[i]), where xs and ys are sequences or NumPy arrays. This
+    is the same as calling text for each string, but the coordinates
+    are scaled all at once and the strings are drawn in a single call.
+    """
+    _makeSureWindowCreated()
+    xs = _scaleX(np.asarray(xs, dtype=float)).tolist()
+    ys = _scaleY(np.asarray(ys, dtype=float)).tolist()
+    blits = []
+    for i in range(len(strings)):
+        text = _renderText(strings[i])
+        blits.append((text, text.get_rect(center=(xs[i], ys[i]))))
+    for rect in _surface.blits(blits):
+        _markDirty(rect)
 
 def boldText(x, y, s):
     """
@@ -503,10 +933,9 @@ def boldText(x, y, s):
     y = float(y)
     xs = _scaleX(x)
     ys = _scaleY(y)
-    font = pygame.font.SysFont(_fontFamily, _fontSize, True)
-    text = font.render(s, 1, _pygameColor(_penColor))
+    text = _renderText(s, True)
     textpos = text.get_rect(center=(xs, ys))
-    _surface.blit(text, textpos)
+    _markDirty(_surface.blit(text, textpos))
 
 def picture(pic, x=None, y=None):
     """
@@ -528,7 +957,116 @@ def picture(pic, x=None, y=None):
     ws = pic.width()
     hs = pic.height()
     picSurface = pic._surface # violates encapsulation
-    _surface.blit(picSurface, [xs-ws/2.0, ys-hs/2.0, ws, hs])
+    _markDirty(_surface.blit(picSurface, [xs-ws/2.0, ys-hs/2.0, ws, hs]))
+
+def renderSprite(w, h, draw):
+    """
+    Call draw, a function without arguments, such that it draws on a new
+    transparent surface of width w and height h instead of the
+    background canvas, with (0, 0) at the center of the surface. Return
+    the surface, which can then be drawn with the sprite function.
+    """
+    global _surface
+    global _drawnRect
+    global _xmin
+    global _xmax
+    global _ymin
+    global _ymax
+    _makeSureWindowCreated()
+    w = float(w)
+    h = float(h)
+    ws = int(round(_factorX(w)))
+    hs = int(round(_factorY(h)))
+    spriteSurface = _newSurface((ws, hs), pygame.SRCALPHA)
+    saved = (_surface, _drawnRect, _xmin, _xmax, _ymin, _ymax)
+    # Keep the scale but move the origin to the center of the sprite.
+    xRange = _xmax - _xmin
+    yRange = _ymax - _ymin
+    _surface = spriteSurface
+    _drawnRect = None
+    _xmin = -w / 2.0
+    _xmax = _xmin + xRange
+    _ymax = h / 2.0
+    _ymin = _ymax - yRange
+    try:
+        draw()
+    finally:
+        _surface, _drawnRect, _xmin, _xmax, _ymin, _ymax = saved
+    return spriteSurface
+
+def sprite(s, x, y):
+    """
+    Draw s, a surface returned by renderSprite, on the background canvas
+    centered at (x, y).
+    """
+    _makeSureWindowCreated()
+    xs = _scaleX(float(x))
+    ys = _scaleY(float(y))
+    _markDirty(_surface.blit(s, (int(round(xs - s.get_width() / 2.0)),
+        int(round(ys - s.get_height() / 2.0)))))
+
+def newLayer(transparent=True):
+    """
+    Return a new layer, that is, a surface with the size of the canvas.
+    The layer is fully transparent if transparent is True and black
+    otherwise. Draw on the layer after calling setLayer with it.
+    """
+    _makeSureWindowCreated()
+    size = (int(_canvasWidth), int(_canvasHeight))
+    if transparent:
+        return _newSurface(size, pygame.SRCALPHA)
+    return _newSurface(size)
+
+def setLayer(layer=None):
+    """
+    Make the subsequent drawing functions draw on layer, a surface
+    returned by newLayer, instead of the background canvas. If layer is
+    None, then draw on the background canvas again.
+    """
+    global _surface
+    global _drawnRect
+    _makeSureWindowCreated()
+    if layer is None:
+        layer = _canvas
+    _surface = layer
+    _drawnRect = None
+
+def drawLayer(layer, area=None):
+    """
+    Draw layer, a surface returned by newLayer, on the background canvas
+    (or on the layer set by setLayer) as a whole. If area, a rectangle
+    in pixels (e.g. returned by getDrawnRect), is not None, then draw
+    only the part of layer in area.
+    """
+    _makeSureWindowCreated()
+    if area is None:
+        _markDirty(_surface.blit(layer, (0, 0)))
+    else:
+        _markDirty(_surface.blit(layer, area.topleft, area))
+
+def clearLayer():
+    """
+    Clear the layer set by setLayer to be fully transparent.
+    """
+    global _drawnRect
+    _makeSureWindowCreated()
+    _markDirty(_surface.fill((0, 0, 0, 0)))
+    # Nothing is drawn on the cleared layer.
+    _drawnRect = None
+
+def getDrawnRect():
+    """
+    Return the smallest rectangle in pixels (a pygame.Rect) that
+    contains everything drawn on the layer set by setLayer (or on the
+    background canvas) since it was set or cleared, or None if nothing
+    was drawn.
+    """
+    if _drawnRect is None:
+        return None
+    rect = _drawnRect.clip(_surface.get_rect())
+    if rect.width <= 0 or rect.height <= 0:
+        return None
+    return rect
 
 def clear(c=WHITE):
     """
@@ -536,7 +1074,7 @@ def clear(c=WHITE):
     object of class color.Color. c defaults to stddraw.WHITE.
     """
     _makeSureWindowCreated()
-    _surface.fill(_pygameColor(c))
+    _markDirty(_surface.fill(_pygameColor(c)))
 
 def save(f):
     """
@@ -554,7 +1092,9 @@ def save(f):
     #else:
     #    pygame.image.save(_surface, f)
 
-    pygame.image.save(_surface, f)
+    if _backend == 'null':
+        raise Exception('The null backend does not keep the drawing')
+    pygame.image.save(_canvas, f)
 
 #-----------------------------------------------------------------------
 
@@ -562,17 +1102,37 @@ def _show():
     """
     Copy the background canvas to the window canvas.
     """
-    _background.blit(_surface, (0, 0))
-    pygame.display.flip()
+    global _dirtyRects
+    global _windowExposed
+    if _backend == 'null':
+        _dirtyRects = []
+        return
+    _windowExposed = False
+    if _dirtyRectMode:
+        # Copy and update only the changed parts of the canvas.
+        canvasRect = _canvas.get_rect()
+        rects = [r.clip(canvasRect) for r in _dirtyRects]
+        rects = [r for r in rects if r.width > 0 and r.height > 0]
+        for r in rects:
+            _background.blit(_canvas, r, r)
+        pygame.display.update(rects)
+        _dirtyRects = []
+    else:
+        _background.blit(_canvas, (0, 0))
+        pygame.display.flip()
     _checkForEvents()
 
 def _showAndWaitForever():
     """
     Copy the background canvas to the window canvas. Then wait
     forever, that is, until the user closes the stddraw window.
+    There is no window to wait for with the offscreen and null
+    backends, so then return immediately.
     """
     _makeSureWindowCreated()
     _show()
+    if _backend != 'window':
+        return
     QUANTUM = .1
     while True:
         time.sleep(QUANTUM)
@@ -585,6 +1145,7 @@ def show(msec=float('inf')):
     """
     if msec == float('inf'):
         _showAndWaitForever()
+        return
 
     _makeSureWindowCreated()
     _show()
@@ -603,6 +1164,20 @@ def show(msec=float('inf')):
         secondsWaited += QUANTUM
         _checkForEvents()
 
+def showFrame(fps=60):
+    """
+    Copy the background canvas to the window canvas, and then wait
+    until 1/fps seconds have passed since the last call of showFrame,
+    so that calling it once per frame keeps a steady frame rate.
+    Return the time passed since the last call in milliseconds.
+    """
+    global _clock
+    _makeSureWindowCreated()
+    _show()
+    if _clock is None:
+        _clock = pygame.time.Clock()
+    return _clock.tick(fps)
+
 #-----------------------------------------------------------------------
 
 def _saveToFile():
@@ -650,9 +1225,20 @@ def _checkForEvents():
     Check if any new event has occured (such as a key typed or button
     pressed).  If a key has been typed, then put that key in a queue.
     """
-    global _surface
-    global _keysTyped
-    
+    _makeSureWindowCreated()
+    if _backend == 'null':
+        return  # there are no events without a display
+
+    for event in pygame.event.get():
+        _handleEvent(event)
+    if _keysHeld:
+        _repeatHeldKeys()
+
+def _handleEvent(event):
+    """
+    Handle the given event (such as a key typed or button pressed).
+    If a key has been typed, then put that key in a queue.
+    """
     #-------------------------------------------------------------------
     # Begin added by Alan J. Broder
     #-------------------------------------------------------------------
@@ -661,30 +1247,90 @@ def _checkForEvents():
     #-------------------------------------------------------------------
     # End added by Alan J. Broder
     #-------------------------------------------------------------------
-    
-    _makeSureWindowCreated()
 
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            sys.exit()
-        elif event.type == pygame.KEYDOWN:
-            _keysTyped = [pygame.key.name(event.key)] + _keysTyped
-        elif (event.type == pygame.MOUSEBUTTONUP) and \
-            (event.button == 3):
-            _saveToFile()
-            
-        #---------------------------------------------------------------
-        # Begin added by Alan J. Broder
-        #---------------------------------------------------------------
-        # Every time the mouse button is pressed, remember
-        # the mouse position as of that press.
-        elif (event.type == pygame.MOUSEBUTTONDOWN) and \
-            (event.button == 1): 
-            _mousePressed = True
-            _mousePos = event.pos                      
-        #---------------------------------------------------------------
-        # End added by Alan J. Broder
-        #---------------------------------------------------------------
+    if event.type == pygame.QUIT:
+        sys.exit()
+    elif event.type == pygame.KEYDOWN:
+        key = pygame.key.name(event.key)
+        now = _ticks()
+        _keysTyped.append((key, now))
+        if _repeatDelay > 0 and (_repeatKeys is None or key in _repeatKeys):
+            _keysHeld[key] = now + _repeatDelay
+    elif event.type == pygame.KEYUP:
+        _keysHeld.pop(pygame.key.name(event.key), None)
+    elif event.type in _EXPOSE_EVENTS:
+        _markExposed()
+    elif (event.type == pygame.MOUSEBUTTONUP) and \
+        (event.button == 3):
+        _saveToFile()
+
+    #-------------------------------------------------------------------
+    # Begin added by Alan J. Broder
+    #-------------------------------------------------------------------
+    # Every time the mouse button is pressed, remember
+    # the mouse position as of that press.
+    elif (event.type == pygame.MOUSEBUTTONDOWN) and \
+        (event.button == 1):
+        _mousePressed = True
+        _mousePos = event.pos
+    #-------------------------------------------------------------------
+    # End added by Alan J. Broder
+    #-------------------------------------------------------------------
+
+def _markExposed():
+    """
+    Record that the window was uncovered or restored, so that the next
+    call of show draws the whole window again (the parts that did not
+    change are not drawn in the dirty rectangle mode otherwise).
+    """
+    global _windowExposed
+    _windowExposed = True
+    if _dirtyRectMode:
+        _dirtyRects.append(_canvas.get_rect())
+
+def _ticks():
+    """
+    Return the time of a monotonic clock in milliseconds.
+    """
+    return time.monotonic() * 1000.0
+
+def _repeatHeldKeys():
+    """
+    Put a repeat of each held key that is due in the queue of the keys
+    the user typed. At most one repeat of a key is queued each time, so
+    the repeats missed while the program did not check for events (e.g.
+    during a long frame) are dropped instead of being typed at once.
+    """
+    now = _ticks()
+    for key, repeatTime in _keysHeld.items():
+        if repeatTime <= now:
+            _keysTyped.append((key, repeatTime))
+            _keysHeld[key] = max(repeatTime + _repeatInterval,
+                                 now + _repeatInterval)
+
+def waitForEvent(msec=1000):
+    """
+    Wait until a new event occurs (such as a key typed or button
+    pressed) or msec milliseconds have passed, without using the CPU
+    while waiting. The window is not redrawn (unless it is uncovered or
+    restored while waiting), so this is meant for waiting while nothing
+    changes (e.g. while a game is paused). The waiting time is not
+    counted as frame time by showFrame.
+    """
+    _makeSureWindowCreated()
+    if _backend == 'null':
+        time.sleep(msec / 1000.0)
+    else:
+        event = pygame.event.wait(int(msec))
+        if event.type != pygame.NOEVENT:
+            _handleEvent(event)
+    _checkForEvents()
+    if _windowExposed:
+        # Draw the uncovered or restored window again, since nothing
+        # else calls show while waiting.
+        _show()
+    if _clock is not None:
+        _clock.tick()
 
 #-----------------------------------------------------------------------
 
@@ -695,23 +1341,49 @@ def hasNextKeyTyped():
     Return True if the queue of the keys the user typed is not empty.
     Otherwise return False.
     """
-    global _keysTyped
-    return _keysTyped != []
+    return len(_keysTyped) != 0
 
 def nextKeyTyped():
     """
     Remove the first key from the queue of the keys that the user typed,
     and return that key.
     """
-    global _keysTyped
-    return _keysTyped.pop()
+    return _keysTyped.popleft()[0]
+
+def drainKeys():
+    """
+    Remove all the keys from the queue of the keys that the user typed,
+    and return them as a list of (key, time) pairs in the order they were
+    typed, where time is when the key was typed in milliseconds.
+    """
+    keys = list(_keysTyped)
+    _keysTyped.clear()
+    return keys
 
 def clearKeysTyped():
     """
     Clear all the keys in the queue of the keys that the user typed.
     """
-    global _keysTyped
-    _keysTyped = []
+    _keysTyped.clear()
+
+def setKeyRepeat(delay=0, interval=0, keys=None):
+    """
+    Make the keys that the user holds down repeat: a held key is typed
+    again after delay milliseconds and then every interval milliseconds
+    until it is released. If keys is not None, only the keys in it
+    repeat. A delay of 0 turns the key repeat off.
+    """
+    global _repeatDelay
+    global _repeatInterval
+    global _repeatKeys
+    if delay < 0:
+        raise Exception('Key repeat delay must be non-negative')
+    if delay > 0 and interval <= 0:
+        raise Exception('Key repeat interval must be positive')
+    _repeatDelay = delay
+    _repeatInterval = interval
+    _repeatKeys = None if keys is None else frozenset(keys)
+    _keysHeld.clear()
 
 #-----------------------------------------------------------------------
 # Begin added by Alan J. Broder
@@ -767,7 +1439,6 @@ def mouseY():
 setXscale()
 setYscale()
 setPenRadius()
-pygame.font.init()
 
 #-----------------------------------------------------------------------
 
@@ -777,6 +1448,8 @@ def _getFileName():
     """
     Display a dialog box that asks the user for a file name.
     """
+    import tkinter as Tkinter
+    import tkinter.filedialog as tkFileDialog
     root = Tkinter.Tk()
     root.withdraw()
     reply = tkFileDialog.asksaveasfilename(initialdir='.')
@@ -788,6 +1461,8 @@ def _confirmFileSave():
     """
     Display a dialog box that confirms a file save operation.
     """
+    import tkinter as Tkinter
+    import tkinter.messagebox as tkMessageBox
     root = Tkinter.Tk()
     root.withdraw()
     tkMessageBox.showinfo(title='File Save Confirmation',
@@ -799,6 +1474,8 @@ def _reportFileSaveError(msg):
     Display a dialog box that reports a msg.  msg is a string which
     describes an error in a file save operation.
     """
+    import tkinter as Tkinter
+    import tkinter.messagebox as tkMessageBox
     root = Tkinter.Tk()
     root.withdraw()
     tkMessageBox.showerror(title='File Save Error', message=msg)
@@ -0,0 +1,130 @@
+import collections  # used for keeping the last durations of each phase
+import contextlib  # used for measuring the phases in with statements
+import json  # used for saving the statistics to a file
+import time  # used for measuring the durations
+import numpy as np  # fundamental Python module for scientific computing
+
+# A class for measuring how long the phases of the frames of the game take
+# (e.g. handling the input, updating the game grid and displaying it). The
+# last durations of each phase are kept for computing the statistics, and
+# nothing is measured while the profiler is disabled
+class Profiler:
+   # the upper bounds of the bins (in milliseconds) of the histograms of the
+   # durations
+   histogram_bounds = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 33, 66, float("inf"))
+   # the context manager returned by the measure method while the profiler is
+   # disabled (it does nothing)
+   null_measurement = contextlib.nullcontext()
+
+   # A constructor for creating a profiler that keeps the last history
+   # durations of each phase
+   def __init__(self, history=600):  # history defaults to 600
+      self.enabled = False
+      self.history = history
+      # the last durations (in milliseconds) of each phase keyed by its name
+      self.durations = {}
+      # the time that the last frame ended at (None if it is not measured)
+      self.last_frame_end = None
+      # the summary of the statistics shown on the screen and the time it is
+      # computed at (it is computed again at most every summary_interval
+      # seconds so that it can be read)
+      self.summary, self.summary_time = None, None
+      self.summary_interval = 0.5
+
+   # A method for enabling the profiler if it is disabled and disabling it
+   # otherwise
+   def toggle(self):
+      self.enabled = not self.enabled
+      # the frame time is measured from the end of the next frame
+      self.last_frame_end = None
+      self.summary, self.summary_time = None, None
+
+   # A method that returns a context manager for measuring the duration of
+   # the phase with the given name, e.g. with profiler.measure("input"): ...
+   def measure(self, phase):
+      if not self.enabled:
+         return Profiler.null_measurement
+      return self.timer(phase)
+
+   # A method that measures the duration of the code run in its with
+   # statement (see the measure method)
+   @contextlib.contextmanager
+   def timer(self, phase):
+      start = time.perf_counter()
+      try:
+         yield
+      finally:
+         self.add(phase, (time.perf_counter() - start) * 1000)
+
+   # A method for adding the given duration (in milliseconds) of the phase
+   # with the given name
+   def add(self, phase, duration):
+      durations = self.durations.get(phase)
+      if durations is None:
+         durations = collections.deque(maxlen=self.history)
+         self.durations[phase] = durations
+      durations.append(duration)
+
+   # A method that is called at the end of each frame for measuring the frame
+   # time, i.e., the time from the end of the last frame
+   def end_frame(self):
+      if not self.enabled:
+         return
+      now = time.perf_counter()
+      if self.last_frame_end is not None:
+         self.add("frame", (now - self.last_frame_end) * 1000)
+      self.last_frame_end = now
+
+   # A method that is called when the time until the end of the next frame
+   # must not be measured as a frame time (e.g. after the game is paused)
+   def skip_frame(self):
+      self.last_frame_end = None
+
+   # A method that returns the statistics of the last durations of the phase
+   # with the given name as a dictionary (None if it is not measured yet)
+   def get_stats(self, phase):
+      durations = self.durations.get(phase)
+      if not durations:
+         return None
+      values = np.array(durations)
+      p50, p90, p99 = np.percentile(values, (50, 90, 99))
+      # the number of durations in each bin of the histogram
+      bins = np.searchsorted(Profiler.histogram_bounds, values)
+      counts = np.bincount(bins, minlength=len(Profiler.histogram_bounds))
+      histogram = {"<=" + str(bound) + " ms": int(count) for bound, count in
+                   zip(Profiler.histogram_bounds, counts)}
+      return {
+         "count": len(values),
+         "mean": float(values.mean()),
+         "p50": float(p50),
+         "p90": float(p90),
+         "p99": float(p99),
+         "max": float(values.max()),
+         "histogram": histogram,
+      }
+
+   # A method that returns a short summary of the frame times (FPS and the
+   # median and the 99th percentile of the frame time) for showing it on the
+   # screen
+   def get_summary(self):
+      now = time.perf_counter()
+      if (self.summary_time is not None and
+            now - self.summary_time < self.summary_interval):
+         return self.summary
+      stats = self.get_stats("frame")
+      if stats is None:
+         return None
+      self.summary = "FPS %.0f  p50 %.1f ms  p99 %.1f ms" % (
+         1000 / stats["mean"], stats["p50"], stats["p99"])
+      self.summary_time = now
+      return self.summary
+
+   # A method for saving the statistics of all the phases to the JSON file
+   # with the given path (nothing is saved if no frame is measured, e.g. when
+   # the profiler is never enabled)
+   def dump(self, path):
+      if not self.durations.get("frame"):
+         return
+      stats = {phase: self.get_stats(phase) for phase in self.durations}
+      with open(path, "w") as file:
+         json.dump(stats, file, indent=2)
@@ -0,0 +1,86 @@
+import random  # used for creating random game grids
+import numpy as np  # fundamental Python module for scientific computing
+
+# The merge_control loop that GameGrid.merge replaced (copied as the reference
+# implementation): the column is scanned from the bottom again after every
+# merge, and the lowest pair of tiles with the same number is merged
+def merge_control(grid, col):
+   column = grid.tile_matrix[:, col]  # a view of the column
+   for row in range(grid.grid_height - 1):
+      if column[row] != 0 and column[row] == column[row + 1]:
+         # doubling the number means incrementing its exponent
+         column[row] += 1
+         grid.score += 1 << int(column[row])
+         # shift the tiles above the merged tiles down by one
+         column[row + 1:-1] = column[row + 2:]
+         column[-1] = 0
+         return True
+   return False
+
+# check merging for every column by using the reference implementation
+def reference_merge(grid):
+   for col in range(grid.grid_width):
+      control = True
+      while control:
+         control = merge_control(grid, col)
+
+# A function that fills the given game grid with random columns with gaps and
+# with runs of numbers that merge one after another (cascades)
+def fill_random(grid, rng):
+   for col in range(grid.grid_width):
+      height = rng.randint(0, grid.grid_height)
+      row = 0
+      while row < height:
+         if rng.random() < 0.3:
+            # a cascade, e.g. 2 2 4 8 16 merges into a single 32
+            exponent = rng.randint(1, 4)
+            run = [exponent, exponent] + list(range(exponent + 1,
+                                                    exponent + rng.randint(1, 4)))
+            for value in run[:height - row]:
+               grid.tile_matrix[row][col] = value
+               row += 1
+         else:
+            # a gap (an empty cell) or a random number
+            if rng.random() < 0.8:
+               grid.tile_matrix[row][col] = rng.randint(1, 4)
+            row += 1
+
+# The merges give the same boards and scores as the merge_control loop on
+# random game grids
+def test_merge_matches_merge_control(create_grid):
+   rng = random.Random(2048)
+   for i in range(2000):
+      grid_h, grid_w = rng.choice(((20, 12), (8, 4), (4, 4), (30, 16)))
+      grid, reference = create_grid(grid_h, grid_w), create_grid(grid_h, grid_w)
+      fill_random(grid, rng)
+      reference.tile_matrix[:] = grid.tile_matrix
+      merged = grid.merge()
+      reference_merge(reference)
+      assert np.array_equal(grid.tile_matrix, reference.tile_matrix)
+      assert grid.score == reference.score
+      assert merged == (reference.score > 0)
+
+# Merging only some columns gives the same boards and scores for these columns
+# as the merge_control loop and does not change the other columns
+def test_merge_columns_matches_merge_control(create_grid):
+   rng = random.Random(4096)
+   for i in range(500):
+      grid, reference = create_grid(), create_grid()
+      fill_random(grid, rng)
+      reference.tile_matrix[:] = grid.tile_matrix
+      columns = set(rng.sample(range(grid.grid_width), rng.randint(1, 5)))
+      grid.merge(columns)
+      for col in columns:
+         while merge_control(reference, col):
+            pass
+      assert np.array_equal(grid.tile_matrix, reference.tile_matrix)
+      assert grid.score == reference.score
+
+# A column where every merge makes a new pair with the tile above it is merged
+# into a single tile (2 2 4 8 16 -> 32)
+def test_merge_cascade(create_grid):
+   grid = create_grid(6, 4)
+   grid.tile_matrix[:5, 0] = (1, 1, 2, 3, 4)
+   grid.merge()
+   assert grid.tile_matrix[:, 0].tolist() == [5, 0, 0, 0, 0, 0]
+   assert grid.score == 4 + 8 + 16 + 32
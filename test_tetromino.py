@@ -0,0 +1,53 @@
+import copy as cp  # used for copying the tetrominoes
+import random  # used for creating random game grids
+from point import Point  # used for tile positions
+from tetromino import Tetromino  # the class for modeling the tetrominoes
+
+# A function that returns how many rows the given tetromino can move down by
+# moving it down row by row (the drop distance must always be the same)
+def step_distance(tetromino, grid):
+   tetromino = cp.deepcopy(tetromino)
+   distance = 0
+   while tetromino.move("down", grid):
+      distance += 1
+   return distance
+
+# A tetromino that enters the game grid over a tile in the top row cannot move
+# down, even when the cell under that tile is empty
+def test_drop_distance_on_occupied_cell(create_grid):
+   grid = create_grid()
+   # two tiles in the top row held up by nothing (e.g. by a side neighbour)
+   grid.tile_matrix[19][0] = grid.tile_matrix[19][1] = 1
+   grid.update_column_heights()
+   tetromino = Tetromino('O')
+   tetromino.bottom_left_cell = Point(0, 19)
+   assert not tetromino.can_be_moved("down", grid)
+   assert tetromino.drop_distance(grid) == 0
+   assert tetromino.hard_drop(grid) == 0
+   assert tetromino.bottom_left_cell.y == 19
+   # locking the tetromino above the game grid ends the game
+   tiles, pos = tetromino.get_min_bounded_tile_matrix(True)
+   assert grid.update_grid(tiles, pos)
+
+# The drop distance is the same as the number of rows that the tetromino can
+# move down row by row on random game grids (with floating tiles and gaps)
+# from the positions that the tetromino can be on
+def test_drop_distance_matches_moving_down(create_grid):
+   rng = random.Random(2048)
+   checked = 0
+   while checked < 300:
+      grid = create_grid()
+      for row in range(grid.grid_height):
+         for col in range(grid.grid_width):
+            if rng.random() < 0.3 * (1 - row / grid.grid_height):
+               grid.tile_matrix[row][col] = rng.randint(1, 5)
+      grid.update_column_heights()
+      tetromino = Tetromino(rng.choice(list(Tetromino.shapes)))
+      tetromino.rotation_state = rng.randrange(4)
+      tetromino.bottom_left_cell = Point(
+         rng.randint(0, grid.grid_width - tetromino.n),
+         rng.randint(0, grid.grid_height - 1))
+      if not tetromino.can_be_placed(grid, 0, 0, tetromino.rotation_state):
+         continue
+      assert tetromino.drop_distance(grid) == step_distance(tetromino, grid)
+      checked += 1
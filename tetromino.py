@@ -4,84 +4,98 @@ import copy as cp  # the copy module is used for copying tiles and positions
 import random  # the random module is used for generating random values
 import numpy as np  # the fundamental Python module for scientific computing
 
-# A class for modeling tetrominoes with 3 out of 7 different types as I, O and Z
+# A function that computes the cells of the tetrominoes with the given shapes
+# in all the 4 rotation states. The cells are returned both as (row_index,
+# column_index) pairs in the tile matrix and as (dx, dy) offsets from the
+# bottom left cell of the tile matrix on the game grid. The offsets are also
+# returned as bitmasks, i.e., (min_dx, max_dx, ((dy, mask), ...)) where the
+# bit dx - min_dx of the mask is set for each (dx, dy) offset. Finally, the
+# offsets of the bottommost tiles in each column are returned as (dx, dy) pairs
+def create_rotation_tables(shapes):
+   cell_table, offset_table, mask_table, bottom_table = {}, {}, {}, {}
+   for shape, (n, occupied_cells) in shapes.items():
+      cells = tuple((row, col) for col, row in occupied_cells)
+      cell_table[shape], offset_table[shape] = [], []
+      mask_table[shape], bottom_table[shape] = [], []
+      for rotation in range(4):
+         cell_table[shape].append(cells)
+         offsets = tuple((col, (n - 1) - row) for row, col in cells)
+         offset_table[shape].append(offsets)
+         min_dx = min(dx for dx, dy in offsets)
+         max_dx = max(dx for dx, dy in offsets)
+         row_masks = {}
+         for dx, dy in offsets:
+            row_masks[dy] = row_masks.get(dy, 0) | (1 << (dx - min_dx))
+         mask_table[shape].append((min_dx, max_dx,
+                                   tuple(sorted(row_masks.items()))))
+         bottoms = {}
+         for dx, dy in offsets:
+            bottoms[dx] = min(bottoms.get(dx, dy), dy)
+         bottom_table[shape].append(tuple(sorted(bottoms.items())))
+         # rotating the tile matrix clockwise (transposing it and reversing the
+         # order of its columns) moves the cell (row, col) to (col, n - 1 - row)
+         cells = tuple((col, (n - 1) - row) for row, col in cells)
+   return cell_table, offset_table, mask_table, bottom_table
+
+# A class for modeling tetrominoes with 7 different types as I, O, Z, S, T, J
+# and L
 class Tetromino:
    # the dimensions of the game grid (defined as class variables)
    grid_height, grid_width = None, None
+   # the number of rows (= the number of columns) in the tile matrix and the
+   # occupied cells as (column_index, row_index) pairs in the initial rotation
+   # state for each shape (see the documentation given with this code)
+   shapes = {
+      'I': (4, ((1, 0), (1, 1), (1, 2), (1, 3))),
+      'O': (2, ((0, 0), (1, 0), (0, 1), (1, 1))),
+      'Z': (3, ((0, 1), (1, 1), (1, 2), (2, 2))),
+      'S': (3, ((0, 2), (1, 2), (1, 1), (2, 1))),
+      'T': (3, ((0, 1), (1, 1), (1, 2), (2, 1))),
+      'L': (3, ((1, 0), (1, 1), (1, 2), (2, 2))),
+      'J': (3, ((1, 0), (1, 1), (1, 2), (0, 2))),
+   }
+   # the cells, the offsets, the row bitmasks and the bottommost offsets of the
+   # tiles for each shape and rotation state (precomputed once so that moving
+   # and rotating are just table lookups)
+   cell_table, offset_table, mask_table, bottom_table = \
+      create_rotation_tables(shapes)
+   # the changes in the position for moving in each direction
+   move_offsets = {"left": (-1, 0), "right": (1, 0), "down": (0, -1)}
 
    # A constructor for creating a tetromino with a given shape (type)
    def __init__(self, shape):
       self.type = shape  # set the type of this tetromino
-      # determine the occupied (non-empty) cells in the tile matrix based on
-      # the shape of this tetromino (see the documentation given with this code)
-      occupied_cells = []
-      if self.type == 'I':
-         n = 4  # n = number of rows = number of columns in the tile matrix
-         # shape of the tetromino I in its initial rotation state
-         occupied_cells.append((1, 0))  # (column_index, row_index)
-         occupied_cells.append((1, 1))
-         occupied_cells.append((1, 2))
-         occupied_cells.append((1, 3))
-      elif self.type == 'O':
-         n = 2  # n = number of rows = number of columns in the tile matrix
-         # shape of the tetromino O in its initial rotation state
-         occupied_cells.append((0, 0))  # (column_index, row_index)
-         occupied_cells.append((1, 0))
-         occupied_cells.append((0, 1))
-         occupied_cells.append((1, 1))
-      elif self.type == 'Z':
-         n = 3  # n = number of rows = number of columns in the tile matrix
-         # shape of the tetromino Z in its initial rotation state
-         occupied_cells.append((0, 1))  # (column_index, row_index)
-         occupied_cells.append((1, 1))
-         occupied_cells.append((1, 2))
-         occupied_cells.append((2, 2))
-      elif self.type == 'S':
-         n = 3  # n = number of rows = number of columns in the tile matrix
-         # shape of the tetromino Z in its initial rotation state
-         occupied_cells.append((0, 2))  # (column_index, row_index)
-         occupied_cells.append((1, 2))
-         occupied_cells.append((1, 1))
-         occupied_cells.append((2, 1))
-      elif self.type == 'T':
-         n = 3  # n = number of rows = number of columns in the tile matrix
-         # shape of the tetromino Z in its initial rotation state
-         occupied_cells.append((0, 1))  # (column_index, row_index)
-         occupied_cells.append((1, 1))
-         occupied_cells.append((1, 2))
-         occupied_cells.append((2, 1))
-      elif self.type == 'L':
-         n = 3  # n = number of rows = number of columns in the tile matrix
-         # shape of the tetromino Z in its initial rotation state
-         occupied_cells.append((1, 0))  # (column_index, row_index)
-         occupied_cells.append((1, 1))
-         occupied_cells.append((1, 2))
-         occupied_cells.append((2, 2))
-      elif self.type == 'J':
-         n = 3  # n = number of rows = number of columns in the tile matrix
-         # shape of the tetromino Z in its initial rotation state
-         occupied_cells.append((1, 0))  # (column_index, row_index)
-         occupied_cells.append((1, 1))
-         occupied_cells.append((1, 2))
-         occupied_cells.append((0, 2))
-      # create a matrix of numbered tiles based on the shape of this tetromino
-      self.tile_matrix = np.full((n, n), None)
-      # create the four tiles (minos) of this tetromino and place these tiles
-      # into the tile matrix
-      for i in range(len(occupied_cells)):
-         col_index, row_index = occupied_cells[i][0], occupied_cells[i][1]
-         # create a tile for each occupied cell of this tetromino
-         self.tile_matrix[row_index][col_index] = Tile()
+      # n = number of rows = number of columns in the tile matrix
+      self.n = Tetromino.shapes[self.type][0]
+      # the rotation state (the number of clockwise rotations modulo 4)
+      self.rotation_state = 0
+      # create the four tiles (minos) of this tetromino, the cells of these
+      # tiles for the current rotation state are given by the get_cells method
+      self.tiles = [Tile() for i in range(4)]
       # initialize the position of this tetromino (as the bottom left cell in
       # the tile matrix) with a random horizontal position above the game grid
       self.bottom_left_cell = Point()
       self.bottom_left_cell.y = Tetromino.grid_height - 1
-      self.bottom_left_cell.x = random.randint(0, Tetromino.grid_width - n)
+      self.bottom_left_cell.x = random.randint(0, Tetromino.grid_width - self.n)
+      # the last computed drop distance and the state it is computed for
+      self.drop_cache, self.drop_cache_key = None, None
+
+   # A method that returns the cells of the tiles in the tile matrix as
+   # (row_index, column_index) pairs (in the same order as self.tiles)
+   def get_cells(self):
+      return Tetromino.cell_table[self.type][self.rotation_state]
+
+   # A method that returns the positions of the tiles on the game grid as
+   # (x, y) pairs (in the same order as self.tiles)
+   def get_tile_positions(self):
+      x, y = self.bottom_left_cell.x, self.bottom_left_cell.y
+      offsets = Tetromino.offset_table[self.type][self.rotation_state]
+      return [(x + dx, y + dy) for dx, dy in offsets]
 
    # A method that computes and returns the position of the cell in the tile
    # matrix specified by the given row and column indexes
    def get_cell_position(self, row, col):
-      n = len(self.tile_matrix)  # n = number of rows = number of columns
+      n = self.n  # n = number of rows = number of columns
       position = Point()
       # horizontal position of the cell
       position.x = self.bottom_left_cell.x + col
@@ -92,28 +106,17 @@ class Tetromino:
    # A method to return a copy of the tile matrix without any empty row/column,
    # and the position of the bottom left cell when return_position is set
    def get_min_bounded_tile_matrix(self, return_position=False):
-      n = len(self.tile_matrix)  # n = number of rows = number of columns
+      n = self.n  # n = number of rows = number of columns
+      cells = self.get_cells()
       # determine rows and columns to copy (omit empty rows and columns)
-      min_row, max_row, min_col, max_col = n - 1, 0, n - 1, 0
-      for row in range(n):
-         for col in range(n):
-            if self.tile_matrix[row][col] is not None:
-               if row < min_row:
-                  min_row = row
-               if row > max_row:
-                  max_row = row
-               if col < min_col:
-                  min_col = col
-               if col > max_col:
-                  max_col = col
-      # copy the tiles from the tile matrix of this tetromino
+      min_row = min(row for row, col in cells)
+      max_row = max(row for row, col in cells)
+      min_col = min(col for row, col in cells)
+      max_col = max(col for row, col in cells)
+      # copy the tiles of this tetromino
       copy = np.full((max_row - min_row + 1, max_col - min_col + 1), None)
-      for row in range(min_row, max_row + 1):
-         for col in range(min_col, max_col + 1):
-            if self.tile_matrix[row][col] is not None:
-               row_ind = row - min_row
-               col_ind = col - min_col
-               copy[row_ind][col_ind] = cp.deepcopy(self.tile_matrix[row][col])
+      for tile, (row, col) in zip(self.tiles, cells):
+         copy[row - min_row][col - min_col] = cp.deepcopy(tile)
       # return just the matrix copy when return_position is not set (as True)
       # the argument return_position defaults to False when a value is not given
       if not return_position:
@@ -124,19 +127,6 @@ class Tetromino:
          blc_position.translate(min_col, (n - 1) - max_row)
          return copy, blc_position
 
-   # A method for drawing the tetromino on the game grid
-   def draw(self):
-      n = len(self.tile_matrix)  # n = number of rows = number of columns
-      for row in range(n):
-         for col in range(n):
-            # draw each occupied cell as a tile on the game grid
-            if self.tile_matrix[row][col] is not None:
-               # get the position of the tile
-               position = self.get_cell_position(row, col)
-               # draw only the tiles that are inside the game grid
-               if position.y < Tetromino.grid_height:
-                  self.tile_matrix[row][col].draw(position)
-
    # A method for moving this tetromino in a given direction by 1 on the grid
    def move(self, direction, game_grid):
       # check if this tetromino can be moved in the given direction by using
@@ -144,89 +134,103 @@ class Tetromino:
       if not (self.can_be_moved(direction, game_grid)):
          return False  # the tetromino cannot be moved in the given direction
       # move this tetromino by updating the position of its bottom left cell
-      if direction == "left":
-         self.bottom_left_cell.x -= 1
-      elif direction == "right":
-         self.bottom_left_cell.x += 1
-      else:  # direction == "down"
-         self.bottom_left_cell.y -= 1
+      dx, dy = Tetromino.move_offsets[direction]
+      self.bottom_left_cell.x += dx
+      self.bottom_left_cell.y += dy
       return True  # a successful move in the given direction
 
-   # check all the tiles including empty ones if they are in game grid and not occupied
+   # A method that returns how many rows this tetromino can move down on the
+   # given game grid (computed from the column heights kept by the game grid
+   # instead of moving this tetromino down row by row)
+   def drop_distance(self, game_grid):
+      x, y = self.bottom_left_cell.x, self.bottom_left_cell.y
+      column_heights = game_grid.column_heights
+      distance = y + self.n  # more than any possible distance
+      # the tiles in each column of a tetromino are adjacent, so only the
+      # bottommost tile of each column needs to be checked
+      for dx, dy in Tetromino.bottom_table[self.type][self.rotation_state]:
+         col, tile_y = x + dx, y + dy
+         height = int(column_heights[col])
+         if tile_y >= height:
+            # the tile is above all the tiles in its column
+            free_rows = tile_y - height
+         elif game_grid.tile_matrix[tile_y][col] != 0:
+            # the tile is on an occupied cell (e.g. the tetromino entered the
+            # game grid over a tile), so it cannot move down at all like in
+            # the can_be_moved method
+            return 0
+         else:
+            # the tile is below the top of its column (e.g. it was moved under
+            # another tile), so find the nearest occupied cell below the tile
+            free_rows = 0
+            while (tile_y - free_rows - 1 >= 0 and
+                   game_grid.tile_matrix[tile_y - free_rows - 1][col] == 0):
+               free_rows += 1
+         distance = min(distance, free_rows)
+      return distance
+
+   # A method that returns the drop distance by computing it only when this
+   # tetromino is moved or rotated or the game grid is updated since the last
+   # call (e.g. for showing the landing position in every frame)
+   def cached_drop_distance(self, game_grid):
+      key = (self.bottom_left_cell.x, self.bottom_left_cell.y,
+             self.rotation_state, id(game_grid), game_grid.version)
+      if key != self.drop_cache_key:
+         self.drop_cache = self.drop_distance(game_grid)
+         self.drop_cache_key = key
+      return self.drop_cache
+
+   # A method for moving this tetromino down as far as possible at once
+   # (This method returns the number of rows that it is moved down.)
+   def hard_drop(self, game_grid):
+      distance = self.cached_drop_distance(game_grid)
+      self.bottom_left_cell.y -= distance
+      return distance
+
+   # check if the tiles are in the game grid and not occupied after the next
+   # clockwise rotation
    def can_be_rotated(self, game_grid):
-      n = len(self.tile_matrix)
-      for row in range(n):
-         for col in range(n):
-            if (self.get_cell_position(row,col).x < 0 or self.get_cell_position(row,col).x > 11 or game_grid.is_occupied(self.get_cell_position(row,col).y,self.get_cell_position(row,col).x)):
-               return False
-      return True
+      return self.can_be_placed(game_grid, 0, 0, (self.rotation_state + 1) % 4)
 
-   # do the rotation with square matrix rotation
-   def rotation(self,game_grid):
-      n = len(self.tile_matrix)
+   # rotate this tetromino clockwise by switching to the next rotation state
+   def rotation(self, game_grid):
       if self.can_be_rotated(game_grid):
-         for i in range(n):
-            for j in range(i):
-                  temp = self.tile_matrix[i][j]
-                  self.tile_matrix[i][j] = self.tile_matrix[j][i]
-                  self.tile_matrix[j][i] = temp
-
-         # Second rotation
-         # with respect to middle column
-         for i in range(n):
-            for j in range(int(n/2)):
-                  temp = self.tile_matrix[i][j]
-                  self.tile_matrix[i][j] = self.tile_matrix[i][n-j-1]
-                  self.tile_matrix[i][n-j-1] = temp
+         self.rotation_state = (self.rotation_state + 1) % 4
 
    # A method for checking if this tetromino can be moved in a given direction
    def can_be_moved(self, direction, game_grid):
-      n = len(self.tile_matrix)  # n = number of rows = number of columns
-      # check for moving left or right
-      if direction == "left" or direction == "right":
-         for row_index in range(n):
-            for col_index in range(n):
-               # direction = left --> check the leftmost tile of each row
-               row, col = row_index, col_index
-               if direction == "left" and self.tile_matrix[row][col] is not None:
-                  # the position of the leftmost tile of the current row
-                  leftmost = self.get_cell_position(row, col)
-                  # if any leftmost tile is at x = 0
-                  if leftmost.x == 0:
-                     return False  # this tetromino cannot be moved left
-                  # if the grid cell on the left of a leftmost tile is occupied
-                  if game_grid.is_occupied(leftmost.y, leftmost.x - 1):
-                     return False  # this tetromino cannot be moved left
-                  # as the leftmost tile of the current row is checked
-                  break  # end the inner for loop
-               # direction = right --> check the rightmost tile of each row
-               row, col = row_index, n - 1 - col_index
-               if direction == "right" and self.tile_matrix[row][col] is not None:
-                  # the position of the rightmost tile of the current row
-                  rightmost = self.get_cell_position(row, col)
-                  # if any rightmost tile is at x = grid_width - 1
-                  if rightmost.x == Tetromino.grid_width - 1:
-                     return False  # this tetromino cannot be moved right
-                  # if the grid cell on the right of a rightmost tile is occupied
-                  if game_grid.is_occupied(rightmost.y, rightmost.x + 1):
-                     return False  # this tetromino cannot be moved right
-                  # as the rightmost tile of the current row is checked
-                  break  # end the inner for loop
-      # direction = down --> check the bottommost tile of each column
-      else:
-         for col in range(n):
-            for row in range(n - 1, -1, -1):
-               # if the current cell of the tetromino is occupied by a tile
-               if self.tile_matrix[row][col] is not None:
-                  # the position of the bottommost tile of the current col
-                  bottommost = self.get_cell_position(row, col)
-                  # if any bottommost tile is at y = 0
-                  if bottommost.y == 0:
-                     return False  # this tetromino cannot be moved down
-                  # if the grid cell below any bottommost tile is occupied
-                  if game_grid.is_occupied(bottommost.y - 1, bottommost.x):
-                     return False  # this tetromino cannot be moved down
-                  # as the bottommost tile of the current row is checked
-                  break  # end the inner for loop
-      # if this method does not end by returning False before this line
-      return True  # this tetromino can be moved in the given direction
+      dx, dy = Tetromino.move_offsets[direction]
+      return self.can_be_placed(game_grid, dx, dy, self.rotation_state)
+
+   # A method for checking if this tetromino fits on the game grid when it is
+   # moved by (dx, dy) and it is in the given rotation state (the tiles must
+   # not be on the left, right or below the game grid or on an occupied cell,
+   # but they can be above the game grid)
+   def can_be_placed(self, game_grid, dx, dy, rotation_state):
+      x = self.bottom_left_cell.x + dx
+      y = self.bottom_left_cell.y + dy
+      grid_height, grid_width = Tetromino.grid_height, Tetromino.grid_width
+      # compare the rows of this tetromino with the rows of the game grid as
+      # bitmasks when the game grid keeps its rows as bitmasks
+      if game_grid.row_bits is not None:
+         min_dx, max_dx, row_masks = Tetromino.mask_table[self.type][rotation_state]
+         if x + min_dx < 0 or x + max_dx >= grid_width:
+            return False
+         row_bits = game_grid.row_bits
+         # the column of the leftmost tile
+         left_x = x + min_dx
+         for offset_y, mask in row_masks:
+            tile_y = y + offset_y
+            if tile_y < 0:
+               return False
+            if tile_y < grid_height and row_bits[tile_y] & (mask << left_x):
+               return False
+         return True
+      tile_matrix = game_grid.tile_matrix
+      for offset_x, offset_y in Tetromino.offset_table[self.type][rotation_state]:
+         tile_x, tile_y = x + offset_x, y + offset_y
+         if tile_x < 0 or tile_x >= grid_width or tile_y < 0:
+            return False
+         if tile_y < grid_height and tile_matrix[tile_y][tile_x] != 0:
+            return False
+      return True
@@ -0,0 +1,33 @@
+import lib.stddraw as stddraw  # used for rendering and drawing the sprites
+from point import Point  # used for tile positions
+
+# A class for drawing tiles as pre-rendered sprites, so that drawing a tile is
+# a single blit instead of several drawing calls
+class TileAtlas:
+   # A constructor for creating an atlas of the tiles drawn by the given
+   # function, i.e., draw_tile(number, position, length)
+   def __init__(self, draw_tile, length=1):  # length defaults to 1
+      self.draw_tile = draw_tile
+      self.length = length
+      # the rendered sprites keyed by the tile numbers
+      self.sprites = {}
+      # the scale of the canvas that the sprites are rendered for
+      self.scale_version = None
+
+   # A method that returns the sprite of the tile with the given number
+   def get_sprite(self, number):
+      # render the sprites again when the canvas size or scale is changed
+      if self.scale_version != stddraw.getScaleVersion():
+         self.sprites = {}
+         self.scale_version = stddraw.getScaleVersion()
+      sprite = self.sprites.get(number)
+      if sprite is None:
+         sprite = stddraw.renderSprite(
+            self.length, self.length,
+            lambda: self.draw_tile(number, Point(0, 0), self.length))
+         self.sprites[number] = sprite
+      return sprite
+
+   # A method for drawing the tile with the given number at a given position
+   def draw(self, number, position):
+      stddraw.sprite(self.get_sprite(number), position.x, position.y)